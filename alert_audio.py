@@ -0,0 +1,160 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Lower value = more urgent. A more urgent alert cuts off whatever is playing;
+# a less urgent one waits for the channel (or is dropped once it is stale).
+PRIORITIES = {
+    'unconscious_detected': 0,
+    'emergency_alert': 1,
+    'heartbeat_warning': 2,
+    'autonomous_engaged': 3,
+    'v2v_alert': 4,
+}
+SOUND_FILES = {
+    'emergency_alert': 'emergency_alert.wav',
+    'unconscious_detected': 'unconscious_alert.wav',
+    'autonomous_engaged': 'autonomous_mode.wav',
+    'v2v_alert': 'v2v_communication.wav',
+    'heartbeat_warning': 'heart_warning.wav',
+}
+# Fallback tones (Hz, seconds, beeps) for alerts without a sound file
+TONES = {
+    'unconscious_detected': (1200, 0.15, 4),
+    'emergency_alert': (880, 0.2, 3),
+    'heartbeat_warning': (660, 0.12, 2),
+    'autonomous_engaged': (520, 0.3, 1),
+    'v2v_alert': (440, 0.1, 2),
+}
+
+
+class AlertEngine:
+    # Preloaded alert sounds played on reserved mixer channels by one worker
+    # thread. trigger() only pushes onto a priority queue, so it is safe and
+    # cheap to call from the camera loop, the monitor thread or the UI.
+    def __init__(self, sound_dir, frequency=44100, buffer=256, max_age=5.0):
+        self.sound_dir = sound_dir
+        self.frequency = frequency
+        self.buffer = buffer
+        self.max_age = max_age
+        self.sounds = {}
+        self.ready = False
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._channel = None
+        self._playing = None   # (priority, name) on the alert channel
+        self._running = False
+        self.latencies = deque(maxlen=256)   # (name, trigger -> play() returned in ms)
+        self.stats = {'played': 0, 'preempted': 0, 'coalesced': 0, 'dropped': 0}
+
+    def start(self):
+        # Small mixer buffer: output latency is buffer / frequency (~6 ms at 256).
+        # SDL would otherwise take over SIGINT/SIGTERM and the process could not be stopped.
+        os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+        import pygame
+        pygame.mixer.pre_init(self.frequency, -16, 2, self.buffer)
+        pygame.mixer.init()
+        pygame.mixer.set_num_channels(8)
+        pygame.mixer.set_reserved(1)
+        self._channel = pygame.mixer.Channel(0)
+        for name in PRIORITIES:
+            path = os.path.join(self.sound_dir, SOUND_FILES[name])
+            # Sound() decodes the whole file to PCM once, so play() is a memcpy away
+            self.sounds[name] = pygame.mixer.Sound(path) if os.path.exists(path) else self._tone(name)
+        self.ready = self._running = True
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+        return len(self.sounds)
+
+    def stop(self):
+        import pygame
+        with self._cond:
+            self.ready = self._running = False
+            self._cond.notify()
+        self._thread.join()
+        pygame.mixer.quit()
+
+    def _tone(self, name):
+        import pygame
+        pitch, length, beeps = TONES[name]
+        frequency, _, channels = pygame.mixer.get_init()
+        t = np.arange(int(frequency * length)) / frequency
+        beep = (np.sin(2 * np.pi * pitch * t) * 12000).astype(np.int16)
+        gap = np.zeros(int(frequency * length / 2), dtype=np.int16)
+        wave = np.tile(np.concatenate([beep, gap]), beeps)
+        return pygame.sndarray.make_sound(np.ascontiguousarray(np.repeat(wave[:, None], channels, axis=1)))
+
+    def trigger(self, name, trace=None):
+        # Non-blocking; repeated triggers of an alert already waiting or playing are merged.
+        # trace (latency_trace.Trace) gets an 'audio' mark when the sound starts
+        if not self.ready:
+            return False
+        with self._cond:
+            playing = self._playing is not None and self._playing[1] == name and self._channel.get_busy()
+            if playing or any(entry[2] == name for entry in self._queue):
+                self.stats['coalesced'] += 1
+                return False
+            heapq.heappush(self._queue, (PRIORITIES[name], next(self._seq), name, time.perf_counter(), trace))
+            self._cond.notify()
+        return True
+
+    def _worker(self):
+        while self._running:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                priority, _, name, triggered, trace = self._queue[0]
+                busy = self._channel.get_busy()
+                if busy and self._playing is not None and self._playing[0] <= priority:
+                    # Something as urgent is still playing; check again shortly
+                    self._cond.wait(0.01)
+                    continue
+                heapq.heappop(self._queue)
+            if time.perf_counter() - triggered > self.max_age:
+                self.stats['dropped'] += 1
+                continue
+            if busy:
+                self.stats['preempted'] += 1
+            self._channel.play(self.sounds[name])   # replaces the current sound
+            self._playing = (priority, name)
+            self.latencies.append((name, (time.perf_counter() - triggered) * 1000))
+            if trace is not None:
+                trace.mark('audio')
+            self.stats['played'] += 1
+
+    def latency_ms(self, name=None):
+        # (p50, p95, max) of trigger-to-play plus the mixer's output buffer; queued
+        # low-priority alerts include the time spent waiting for the channel
+        values = [ms for alert, ms in self.latencies if name is None or alert == name]
+        if not values:
+            return None
+        values = np.array(values) + self.buffer / self.frequency * 1000
+        return float(np.percentile(values, 50)), float(np.percentile(values, 95)), float(values.max())
+
+
+if __name__ == "__main__":
+    # python alert_audio.py [SOUND_DIR]: fire alerts from several threads and report latency
+    import sys
+    engine = AlertEngine(sys.argv[1] if len(sys.argv) > 1 else 'sounds')
+    engine.start()
+    # Low-priority chatter, with an urgent alert arriving while it plays
+    for i in range(10):
+        threading.Thread(target=engine.trigger, args=('v2v_alert',)).start()
+        time.sleep(0.1)
+        threading.Thread(target=engine.trigger, args=('unconscious_detected',)).start()
+        threading.Thread(target=engine.trigger, args=('heartbeat_warning',)).start()
+        time.sleep(1.2)
+    engine.stop()
+    print(engine.stats)
+    for name in PRIORITIES:
+        measured = engine.latency_ms(name)
+        if measured is not None:
+            print(f"{name:22s} p50 {measured[0]:7.1f} ms  p95 {measured[1]:7.1f} ms  max {measured[2]:7.1f} ms")
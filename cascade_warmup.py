@@ -0,0 +1,55 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+FACE_MODEL = 'haarcascade_frontalface_default.xml'
+EYE_MODEL = 'haarcascade_eye.xml'
+
+
+def load_cascade(name):
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + name)
+    if cascade.empty():
+        raise IOError(f"Could not load cascade {name}")
+    return cascade
+
+
+def set_threads(threads=None):
+    # OpenCV's default pool uses every core; leave room for the UI and monitor threads
+    if threads is None:
+        threads = max(1, min(4, (os.cpu_count() or 2) - 1))
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(threads)
+    return threads
+
+
+def synthetic_face(width, height, seed=0):
+    # Grey noise with a bright oval and two dark eyes, so the cascades run past
+    # their first stages and touch the same code paths as a real face
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(40, 90, (height, width), dtype=np.uint8)
+    cx, cy = width // 2, height // 2
+    fw, fh = width // 6, height // 4
+    cv2.ellipse(frame, (cx, cy), (fw, fh), 0, 0, 360, 180, -1)
+    for dx in (-fw // 2, fw // 2):
+        cv2.ellipse(frame, (cx + dx, cy - fh // 4), (fw // 5, fh // 9), 0, 0, 360, 30, -1)
+    cv2.line(frame, (cx - fw // 3, cy + fh // 2), (cx + fw // 3, cy + fh // 2), 60, 3)
+    return frame
+
+
+def warm_up(face_cascade, eye_cascade, frame_size=(320, 240), face_params=None, eye_params=None,
+            rounds=3):
+    # Runs the same detectMultiScale calls the camera loop makes; returns per-round ms
+    face_params = face_params or {}
+    eye_params = eye_params or {}
+    width, height = frame_size
+    timings = []
+    for i in range(rounds):
+        frame = synthetic_face(width, height, seed=i)
+        start = time.perf_counter()
+        faces = face_cascade.detectMultiScale(frame, **face_params)
+        x, y, w, h = faces[0] if len(faces) else (width // 3, height // 4, width // 3, height // 2)
+        eye_cascade.detectMultiScale(frame[y:y + h, x:x + w], **eye_params)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
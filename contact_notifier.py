@@ -0,0 +1,175 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+Contact = namedtuple('Contact', 'name url')
+Delivery = namedtuple('Delivery', 'contact ok attempts elapsed_ms error')
+
+
+class ContactNotifier:
+    # Sends one POST per contact, all at once, over a pooled keep-alive session.
+    # Every request has its own connect/read timeout and a few retries with
+    # jittered backoff; what still fails is appended to an on-disk outbox and
+    # re-sent by the retry loop once the network is back.
+    def __init__(self, contacts, outbox_path, timeout=(1.0, 2.0), retries=2, backoff=0.2, max_workers=32):
+        self.contacts = list(contacts)
+        self.outbox_path = outbox_path
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max_workers, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='notify')
+        self._outbox_lock = threading.Lock()
+        self._retry_thread = None
+
+    @classmethod
+    def from_json(cls, path, outbox_path, **kwargs):
+        # [{"name": "Family Contact", "url": "https://..."}, ...]
+        with open(path, encoding='utf-8') as f:
+            return cls([Contact(c['name'], c['url']) for c in json.load(f)], outbox_path, **kwargs)
+
+    def notify(self, payload):
+        # Blocks for roughly one round trip (plus retries); returns a Delivery per contact
+        message_id = uuid.uuid4().hex
+        futures = [self._executor.submit(self._send, contact, message_id, payload) for contact in self.contacts]
+        deliveries = [future.result() for future in futures]
+        failed = [(d.contact, message_id) for d in deliveries if not d.ok]
+        if failed:
+            self._append_outbox([{'name': c.name, 'url': c.url, 'id': m, 'payload': payload} for c, m in failed])
+        return deliveries
+
+    def _send(self, contact, message_id, payload):
+        start = time.perf_counter()
+        error = None
+        for attempt in range(1, self.retries + 2):
+            try:
+                # The same id on every attempt lets the receiver drop duplicates
+                response = self.session.post(contact.url, json=dict(payload, id=message_id),
+                                             headers={'Idempotency-Key': message_id}, timeout=self.timeout)
+                if response.status_code < 500:
+                    ok = response.ok
+                    error = None if ok else f"HTTP {response.status_code}"
+                    return Delivery(contact, ok, attempt, (time.perf_counter() - start) * 1000, error)
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = type(e).__name__
+            if attempt <= self.retries:
+                time.sleep(self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        return Delivery(contact, False, self.retries + 1, (time.perf_counter() - start) * 1000, error)
+
+    def _append_outbox(self, entries):
+        with self._outbox_lock:
+            with open(self.outbox_path, 'a', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def pending(self):
+        with self._outbox_lock:
+            if not os.path.exists(self.outbox_path):
+                return []
+            with open(self.outbox_path, encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+
+    def flush_outbox(self):
+        # Re-send everything queued; entries that fail again stay in the outbox
+        entries = self.pending()
+        if not entries:
+            return 0, 0
+        futures = [self._executor.submit(self._send, Contact(e['name'], e['url']), e['id'], e['payload'])
+                   for e in entries]
+        remaining = [e for e, future in zip(entries, futures) if not future.result().ok]
+        with self._outbox_lock:
+            # Keep anything appended while we were sending
+            with open(self.outbox_path, encoding='utf-8') as f:
+                added = [json.loads(line) for line in f if line.strip()][len(entries):]
+            tmp = self.outbox_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for entry in remaining + added:
+                    f.write(json.dumps(entry) + '\n')
+            os.replace(tmp, self.outbox_path)
+        return len(entries) - len(remaining), len(remaining)
+
+    def start_retry_loop(self, interval=30.0, on_flush=None):
+        def loop():
+            while True:
+                time.sleep(interval * random.uniform(0.8, 1.2))
+                try:
+                    sent, left = self.flush_outbox()
+                except OSError:
+                    continue
+                if sent and on_flush is not None:
+                    on_flush(sent, left)
+
+        if self._retry_thread is None:
+            self._retry_thread = threading.Thread(target=loop, daemon=True)
+            self._retry_thread.start()
+
+
+if __name__ == "__main__":
+    # python contact_notifier.py [CONTACTS] [RTT_MS]: benchmark against a local stub server
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rtt = (float(sys.argv[2]) if len(sys.argv) > 2 else 100) / 1000
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(rtt)
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'ok')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/notify"
+    outbox = os.path.join(tempfile.mkdtemp(), 'outbox.jsonl')
+    notifier = ContactNotifier([Contact(f"contact-{i}", url) for i in range(count)], outbox)
+    payload = {'type': 'emergency', 'location': [40.7128, -74.0060]}
+
+    start = time.perf_counter()
+    for contact in notifier.contacts[:3]:
+        notifier.session.post(contact.url, json=payload, timeout=notifier.timeout)
+    sequential = (time.perf_counter() - start) / 3 * count
+    for label in ('cold', 'warm'):
+        start = time.perf_counter()
+        deliveries = notifier.notify(payload)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {sum(d.ok for d in deliveries)}/{count} delivered in {elapsed * 1000:.0f} ms "
+              f"(stub RTT {rtt * 1000:.0f} ms, sequential ~{sequential * 1000:.0f} ms)")
+
+    # Offline: nothing listens on the port, so every message lands in the outbox;
+    # once a server is back on that port the outbox drains in one flush
+    probe = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    port = probe.server_address[1]
+    probe.server_close()
+    offline = ContactNotifier([Contact(f"contact-{i}", f"http://127.0.0.1:{port}/notify") for i in range(count)],
+                              outbox, timeout=(0.2, 0.5), retries=1, backoff=0.05)
+    offline.notify(payload)
+    print(f"offline: {len(offline.pending())} queued in outbox")
+    restored = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    threading.Thread(target=restored.serve_forever, daemon=True).start()
+    start = time.perf_counter()
+    sent, left = offline.flush_outbox()
+    print(f"reconnected: {sent} sent from outbox in {(time.perf_counter() - start) * 1000:.0f} ms, {left} left")
@@ -0,0 +1,193 @@
+import csv
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+
+from cascade_warmup import EYE_MODEL, FACE_MODEL, load_cascade, set_threads, warm_up
+
+
+class CascadeStrategy:
+    # One way of running the face/eye cascades over camera frames. process()
+    # returns (face_found, driver_alert) with the same semantics the apps use:
+    # the driver counts as alert only when a face is found and its eyes are.
+    def __init__(self, detect_size=None, scale=1.3, neighbors=5, min_size=None, eye_scale=1.1,
+                 eye_neighbors=3, eye_min_size=None, eye_every=1, eyes_needed=2):
+        self.detect_size = detect_size
+        self.face_params = dict(scaleFactor=scale, minNeighbors=neighbors)
+        if min_size:
+            self.face_params['minSize'] = min_size
+        self.eye_params = dict(scaleFactor=eye_scale, minNeighbors=eye_neighbors)
+        if eye_min_size:
+            self.eye_params['minSize'] = eye_min_size
+        self.eye_every = eye_every
+        self.eyes_needed = eyes_needed
+        self.face_cascade = load_cascade(FACE_MODEL)
+        self.eye_cascade = load_cascade(EYE_MODEL)
+        self.reset()
+
+    def reset(self):
+        self._eye_counter = -1
+        self._eyes_open = False
+
+    def warm_up(self):
+        size = self.detect_size or (640, 480)
+        warm_up(self.face_cascade, self.eye_cascade, size, self.face_params, self.eye_params)
+
+    def process(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.detect_size:
+            small = cv2.resize(gray, self.detect_size)
+            sx = gray.shape[1] / self.detect_size[0]
+            sy = gray.shape[0] / self.detect_size[1]
+            faces = [(int(x * sx), int(y * sy), int(w * sx), int(h * sy))
+                     for x, y, w, h in self.face_cascade.detectMultiScale(small, **self.face_params)]
+        else:
+            faces = self.face_cascade.detectMultiScale(gray, **self.face_params)
+        alert = len(faces) > 0
+        for x, y, w, h in faces:
+            # The eye counter advances per face, as in driver_monitoring.py
+            self._eye_counter += 1
+            if self._eye_counter % self.eye_every == 0:
+                eyes = self.eye_cascade.detectMultiScale(gray[y:y + h, x:x + w], **self.eye_params)
+                self._eyes_open = len(eyes) >= self.eyes_needed
+            if not self._eyes_open:
+                alert = False
+        return len(faces) > 0, alert
+
+
+# Add future strategies here; each entry builds a fresh CascadeStrategy
+STRATEGIES = {
+    # workingV2.py: full frame, 1.3/5, default eye parameters on every frame, two eyes
+    'workingV2': lambda: CascadeStrategy(scale=1.3, neighbors=5, eye_scale=1.1, eye_neighbors=3),
+    # driver_monitoring.py: 320x240, 1.2/4, eyes every 5th face, one eye is enough
+    'driver_monitoring': lambda: CascadeStrategy(detect_size=(320, 240), scale=1.2, neighbors=4,
+                                                 min_size=(30, 30), eye_min_size=(10, 10), eye_every=5,
+                                                 eyes_needed=1),
+}
+
+
+def load_labels(video):
+    # <video>.labels.csv: start,end,face,drowsy (inclusive frame ranges, 0/1)
+    # Frames outside every range are not scored.
+    path = os.path.splitext(video)[0] + '.labels.csv'
+    labels = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for frame in range(int(row['start']), int(row['end']) + 1):
+                labels[frame] = (row['face'] == '1', row['drowsy'] == '1')
+    return labels
+
+
+def find_videos(paths):
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            videos += sorted(v for ext in ('mp4', 'avi', 'mkv', 'mov')
+                             for v in glob.glob(os.path.join(path, f'*.{ext}')))
+        else:
+            videos.append(path)
+    return [v for v in videos if os.path.exists(os.path.splitext(v)[0] + '.labels.csv')]
+
+
+def peak_memory_mb():
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+
+def run_strategy(name, videos):
+    # Runs in its own process so CPU time and peak memory belong to one strategy
+    set_threads()
+    strategy = STRATEGIES[name]()
+    strategy.warm_up()
+    counts = {'face': [0, 0, 0], 'drowsy': [0, 0, 0]}   # tp, fp, fn
+    frames = 0
+    busy = 0.0
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for video in videos:
+        labels = load_labels(video)
+        strategy.reset()
+        cap = cv2.VideoCapture(video)
+        index = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            start = time.perf_counter()
+            face, alert = strategy.process(frame)
+            busy += time.perf_counter() - start
+            frames += 1
+            if index in labels:
+                true_face, true_drowsy = labels[index]
+                for key, predicted, actual in (('face', face, true_face),
+                                               ('drowsy', not alert, true_drowsy or not true_face)):
+                    if predicted and actual:
+                        counts[key][0] += 1
+                    elif predicted:
+                        counts[key][1] += 1
+                    elif actual:
+                        counts[key][2] += 1
+            index += 1
+        cap.release()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    result = {'strategy': name, 'frames': frames, 'fps': frames / busy if busy else 0.0,
+              'cpu_percent': 100 * cpu / wall if wall else 0.0, 'memory_mb': peak_memory_mb()}
+    for key, (tp, fp, fn) in counts.items():
+        result[f'{key}_precision'] = tp / (tp + fp) if tp + fp else None
+        result[f'{key}_recall'] = tp / (tp + fn) if tp + fn else None
+    return result
+
+
+def compare(videos, names=None):
+    results = []
+    for name in names or STRATEGIES:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', name] + videos,
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def format_table(results):
+    def cell(value, spec):
+        return format(value, spec) if value is not None else 'n/a'
+
+    header = (f"{'strategy':20s} {'frames':>7s} {'det FPS':>8s} {'CPU %':>6s} {'RSS MB':>7s} "
+              f"{'face P':>7s} {'face R':>7s} {'drowsy P':>9s} {'drowsy R':>9s}")
+    lines = [header, '-' * len(header)]
+    for r in results:
+        lines.append(f"{r['strategy']:20s} {r['frames']:7d} {r['fps']:8.1f} {r['cpu_percent']:6.0f} "
+                     f"{cell(r['memory_mb'], '7.0f'):>7s} {cell(r['face_precision'], '7.3f'):>7s} "
+                     f"{cell(r['face_recall'], '7.3f'):>7s} {cell(r['drowsy_precision'], '9.3f'):>9s} "
+                     f"{cell(r['drowsy_recall'], '9.3f'):>9s}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    # python detection_bench.py VIDEO_OR_DIR [...] [--strategies=workingV2,driver_monitoring] [--json]
+    if len(sys.argv) > 2 and sys.argv[1] == '--worker':
+        print(json.dumps(run_strategy(sys.argv[2], sys.argv[3:])))
+        sys.exit(0)
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) if '=' in a else (a[2:], '1') for a in sys.argv[1:] if a.startswith('--'))
+    videos = find_videos(args)
+    if not videos:
+        print("usage: detection_bench.py VIDEO_OR_DIR [...] [--strategies=A,B] [--json]")
+        print("each video needs a <name>.labels.csv with start,end,face,drowsy rows")
+        sys.exit(1)
+    names = options['strategies'].split(',') if 'strategies' in options else None
+    results = compare(videos, names)
+    print(json.dumps(results, indent=2) if 'json' in options else format_table(results))
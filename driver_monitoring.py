@@ -1,41 +1,99 @@
-import tkinter as tk
-from tkinter import ttk, messagebox
+import time
+STARTUP_T0 = time.perf_counter()
 import cv2
 import numpy as np
-from PIL import Image, ImageTk
+from PIL import Image
 import threading
-import time
 import random
-import math
-import json
+import os
+import subprocess
+import sys
+from collections import deque
 from datetime import datetime
-import folium
-import webview
-import requests
-from geopy.distance import geodesic
-import pygame
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.animation import FuncAnimation
+# pygame and matplotlib are imported on first use (init_audio, create_route_tab)
+from vehicle_table import VehicleTable
+from v2v_relay import GossipRelay, Message
+from routing import Router
+from geo_index import haversine_m
+from poi_index import PoiIndex
+from route_cache import RouteCache
+from isochrone_grid import IsochroneGrid
+from tile_cache import TileCache, TilePack, render_folium_map
+from safe_stop import SafeStopIndex
+from alert_audio import AlertEngine
+from cascade_warmup import EYE_MODEL, FACE_MODEL, load_cascade, set_threads, warm_up
+from latency_trace import LatencyRecorder
+from emergency_pipeline import Stage, StagedPipeline
+from frame_governor import FrameGovernor
+from seat_roi import SeatRoi
+from state_checkpoint import Checkpoint, Checkpointer, load_checkpoint
+from perf_config import ConfigWatcher, load_config, save_config, validate, DEFAULTS
+IMPORTS_DONE = time.perf_counter()
+
+# Live state of the in-cab unit; tools that drive the app (latency_trace.py,
+# soak_test.py) pass checkpoint_path=None so they never read or overwrite it
+CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'state.ckpt')
+
+# tkinter and PIL.ImageTk are imported by load_tk() when a GUI is built, so the
+# headless service runs on machines without Tk
+tk = ttk = messagebox = ImageTk = None
+
+def load_tk():
+    global tk, ttk, messagebox, ImageTk
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+    from PIL import ImageTk
 
 class DriverMonitoringSystem:
-    def __init__(self, root):
+    def __init__(self, root, headless=False, video_source=0, state_hub=None, checkpoint_path=CHECKPOINT_PATH):
+        # headless: root is a headless.HeadlessLoop and no widgets are built;
+        # state is served by state_server.py instead
         self.root = root
-        self.root.title("Smart Driver Monitoring & Emergency Response System")
-        self.root.geometry("1400x900")
-        self.root.configure(bg='#1a1a1a')
-        
-        # Initialize pygame for sound alerts
-        pygame.mixer.init()
-        
-        # Sound effects (you'll need to add these sound files)
-        self.sounds = {
-            'emergency_alert': None,  # Add: emergency_alert.wav
-            'unconscious_detected': None,  # Add: unconscious_alert.wav
-            'autonomous_engaged': None,  # Add: autonomous_mode.wav
-            'v2v_alert': None,  # Add: v2v_communication.wav
-            'heartbeat_warning': None  # Add: heart_warning.wav
-        }
+        self.headless = headless
+        self.video_source = video_source
+        if not headless:
+            load_tk()
+            self.root.title("Smart Driver Monitoring & Emergency Response System")
+            self.root.geometry("1400x900")
+            self.root.configure(bg='#1a1a1a')
+        
+        # Startup timing (ms since the module started importing)
+        self.startup_marks = [("imports", (IMPORTS_DONE - STARTUP_T0) * 1000)]
+        self._camera_started_at = None
+        
+        # Widgets of tabs that have not been built yet are None; output meant for
+        # them is kept and applied when the tab is first opened
+        self.camera_label = None
+        self.emergency_status_label = None
+        self.actions_text = None
+        self.comm_text = None
+        self.route_info_text = None
+        self.route_map = None
+        self.vehicles_tree = None
+        self._pending_actions = deque(maxlen=500)
+        self._pending_comms = deque(maxlen=500)
+        self.max_log_lines = 1000
+        # Log lines from any thread; written to the Text widgets by the Tk thread
+        self._log_queue = deque()
+        self._log_flush_pending = False
+        # Live state/event feed for subscribers (headless mode); set before anything
+        # logs so events from startup reach it too
+        self.state_hub = state_hub
+        
+        # Capture-to-reaction latency of the emergency chain (see latency_trace.py);
+        # slump_trace is the stamp of the frame where the driver was first lost
+        self.latency = LatencyRecorder()
+        self.slump_trace = None
+        # The camera loop decides on its own once the driver has been lost this long,
+        # instead of waiting up to a second for the monitor tick
+        self.slump_confirm = 0.2  # seconds
+        self._lost_since = 0.0
+        self._emergency_lock = threading.Lock()  # camera loop and monitor tick both decide
+        
+        # Sound alerts; the mixer is started in the background once the window is up.
+        # Files in sounds/ are optional (see alert_audio.SOUND_FILES), missing ones
+        # fall back to generated tones
+        self.alerts = AlertEngine(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sounds'))
         
         # System state variables
         self.monitoring_active = False
@@ -44,25 +102,116 @@ class DriverMonitoringSystem:
         self.driver_conscious = True
         self.heart_rate = 72
         self.fatigue_level = 0
+        self.vitals_history = deque(maxlen=120)  # (time, heart rate, fatigue), one per second
         self.speed = 0
+        self.heading = 0.0  # Degrees clockwise from north
         self.current_location = [40.7128, -74.0060]  # NYC coordinates
         self.destination = [40.7589, -73.9851]  # Times Square
         self.emergency_contacts = ["Emergency Services", "Family Contact", "Medical Center"]
         
+        # Offline routing (road graph built with routing.py, loaded on first use)
+        self.road_graph_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                            'data', 'road_graph.npz')
+        self.router = None
+        self.route_cache = None
+        # Hospitals and other facilities (name,category,lat,lon), spatially indexed
+        self.poi_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'pois.csv')
+        self.poi_index = None
+        # Precomputed fastest hospitals per grid cell (built with isochrone_grid.py)
+        self.hospital_grid_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                               'data', 'hospital_grid')
+        self.hospital_grid = None
+        # Offline map tiles: packed for the in-app map, plain z/x/y tree for the folium view
+        self.tile_pack_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tiles.pack')
+        self.tiles_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tiles')
+        self.map_view_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'route_map.html')
+        self.tile_cache = None
+        # The folium view is rendered by one worker, for the latest route only
+        self._map_view_route = None
+        self._map_view_nodes = None
+        self._map_view_wake = threading.Event()
+        self._map_view_thread = None
+        # Shoulders, pull-offs and parking areas (name,kind,lat,lon[,heading])
+        self.safe_stops_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'safe_stops.csv')
+        self.safe_stops = None
+        # Contact endpoints ([{"name", "url"}]); undelivered messages wait in the outbox
+        self.contacts_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'contacts.json')
+        self.outbox_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'outbox.jsonl')
+        self.notifier = None
+        self._notifier_lock = threading.Lock()  # created from on_window_ready or the pipeline, once
+        self.hospital_name = "City General Hospital"
+        self.hospital_location = [40.7306, -73.9866]
+        self.emergency_route = None
+        self.destination_route = None
+        
+        # Performance knobs (capture rate, cascade parameters, eye cadence); edits to
+        # the file are picked up while running and swapped in as one object
+        self.config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'perf_config.json')
+        try:
+            self.perf = load_config(self.config_path)
+        except (OSError, ValueError) as e:
+            self.log_action(f"Invalid {self.config_path}, using defaults: {str(e)}")
+            self.perf = DEFAULTS
+        self.config_watcher = ConfigWatcher(
+            self.config_path,
+            on_change=lambda config: self.root.after(0, self.apply_perf_config, config),
+            on_error=lambda e: self.log_action(f"Config reload rejected: {str(e)}"))
+        # Camera-loop rate follows risk and CPU load within the configured bounds
+        self.governor = FrameGovernor(self.perf.min_fps, self.perf.capture_fps, self.perf.max_fps)
+        
         # Camera and CV variables
         self.cap = None
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
-        
-        # V2V Communication simulation
-        self.nearby_vehicles = [
-            {"id": "VEH001", "distance": 50, "direction": "ahead"},
-            {"id": "VEH002", "distance": 30, "direction": "behind"},
-            {"id": "VEH003", "distance": 25, "direction": "left"},
-        ]
-        
-        self.setup_gui()
+        # Where the driver's head sits; learned on the first minutes of driving
+        self.seat_roi = SeatRoi(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'seat_roi.json'))
+        self.seat_roi.load()
+        # Cascades are loaded and warmed up in the background while the UI builds
+        self.face_cascade = None
+        self.eye_cascade = None
+        self.detector_ready = threading.Event()
+        
+        # V2V Communication simulation (columnar table, see vehicle_table.py)
+        self.nearby_vehicles = VehicleTable()
+        # Neighbours not heard from for this long are dropped from the table
+        self.vehicle_max_age = 30.0
+        # Simulated neighbours travel with us and beacon every monitor tick
+        self.simulated_vehicles = [("VEH001", 50, 0), ("VEH002", 30, 180), ("VEH003", 25, 270)]
+        self.update_vehicle_positions()
+        
+        # Multi-hop relay for emergency alerts (dedup, hop TTL, per-sender rate limits)
+        self.vehicle_id = "EGO"
+        self.v2v_relay = GossipRelay(self.vehicle_id, self.transmit_v2v, self.on_v2v_message)
+        
+        # Vehicle list refresh state: stable row per vehicle ID, throttled redraws
+        self._vehicle_rows = {}
+        self._vehicles_refresh_pending = False
+        self._vehicles_last_refresh = 0.0
+        self.vehicles_refresh_interval = 0.25  # seconds
+        
+        # Emergency response stages run concurrently (see emergency_pipeline.py)
+        self.emergency_pipeline = StagedPipeline()
+        self.emergency_status = ("No Emergency Detected", 'green')
+        self.route_info = ""
+        
+        # Crash recovery: resume from a recent checkpoint, then keep writing compact
+        # binary checkpoints off the Tk/camera thread (see state_checkpoint.py)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_max_age = 600  # seconds; older state is not resumed
+        self.checkpointer = None
+        if checkpoint_path:
+            self.restore_checkpoint()
+            self.checkpointer = Checkpointer(
+                self.checkpoint_path, self.checkpoint_state,
+                on_error=lambda e: self.log_action(f"Checkpoint failed: {str(e)}")).start()
+        
+        # Background threads start only once all the state they touch exists
+        threading.Thread(target=self.warm_up_detector, daemon=True).start()
+        self.config_watcher.start()
+        if not headless:
+            self.setup_gui()
+            self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.mark_startup("gui built")
         self.start_monitoring_thread()
+        self.root.after_idle(self.on_window_ready)
         
     def setup_gui(self):
         # Create main frame
@@ -84,12 +233,74 @@ class DriverMonitoringSystem:
         style.configure('TNotebook', background='#2a2a2a')
         style.configure('TNotebook.Tab', background='#3a3a3a', foreground='white')
         
-        # Create tabs
+        # Create tabs; only the monitoring tab is built up front, the others on first selection
         self.create_monitoring_tab()
-        self.create_emergency_tab()
-        self.create_route_tab()
-        self.create_v2v_tab()
-        self.create_settings_tab()
+        self.lazy_tabs = {}
+        for text, builder in [('Emergency Response', self.create_emergency_tab),
+                              ('Autonomous Routing', self.create_route_tab),
+                              ('V2V Communication', self.create_v2v_tab),
+                              ('Settings', self.create_settings_tab)]:
+            frame = tk.Frame(self.notebook, bg='#2a2a2a')
+            self.notebook.add(frame, text=text)
+            self.lazy_tabs[str(frame)] = (text, frame, builder)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+    
+    def on_tab_changed(self, event):
+        tab = self.lazy_tabs.pop(self.notebook.select(), None)
+        if tab is not None:
+            text, frame, builder = tab
+            start = time.perf_counter()
+            builder(frame)
+            self.log_action(f"Built '{text}' tab in {(time.perf_counter() - start) * 1000:.0f} ms")
+    
+    def on_window_ready(self):
+        self.mark_startup("window ready")
+        self.report_startup()
+        threading.Thread(target=self.init_audio, daemon=True).start()
+        # Loads the contacts and starts draining any outbox left by a previous run
+        threading.Thread(target=self.get_notifier, daemon=True).start()
+    
+    def mark_startup(self, label):
+        self.startup_marks.append((label, (time.perf_counter() - STARTUP_T0) * 1000))
+    
+    def report_startup(self):
+        report = "Startup: " + ", ".join(f"{label} {ms:.0f} ms" for label, ms in self.startup_marks)
+        self.log_action(report)
+    
+    def warm_up_detector(self):
+        try:
+            start = time.perf_counter()
+            threads = set_threads()
+            face_cascade = load_cascade(FACE_MODEL)
+            eye_cascade = load_cascade(EYE_MODEL)
+            # Same parameters as update_camera_feed
+            perf = self.perf
+            timings = warm_up(face_cascade, eye_cascade, (perf.detect_width, perf.detect_height),
+                              dict(scaleFactor=perf.scale_factor, minNeighbors=perf.min_neighbors,
+                                   minSize=(perf.min_face, perf.min_face)),
+                              dict(scaleFactor=perf.eye_scale_factor, minNeighbors=perf.eye_min_neighbors,
+                                   minSize=(perf.min_eye, perf.min_eye)))
+            self.face_cascade, self.eye_cascade = face_cascade, eye_cascade
+            self.log_action(f"Detector ready in {(time.perf_counter() - start) * 1000:.0f} ms "
+                            f"({threads} threads, warm-up passes "
+                            f"{', '.join(f'{t:.1f}' for t in timings)} ms)")
+        except Exception as e:
+            self.log_action(f"Detector warm-up failed: {str(e)}")
+        finally:
+            self.detector_ready.set()
+    
+    def init_audio(self):
+        try:
+            count = self.alerts.start()
+            self.log_action(f"Audio ready: {count} alert sounds preloaded")
+        except Exception as e:
+            self.log_action(f"Audio unavailable: {str(e)}")
+    
+    def report_alert_latency(self):
+        measured = self.alerts.latency_ms()
+        if measured is not None:
+            self.log_action(f"Alert audio latency: p50 {measured[0]:.1f} ms, p95 {measured[1]:.1f} ms, "
+                            f"max {measured[2]:.1f} ms")
         
     def create_monitoring_tab(self):
         # Driver Monitoring Tab
@@ -170,18 +381,17 @@ class DriverMonitoringSystem:
         tk.Button(controls_frame, text="Reset to Normal", 
                  command=self.reset_to_normal, bg='#4CAF50', fg='white').pack(pady=2)
         
-    def create_emergency_tab(self):
+    def create_emergency_tab(self, emergency_frame):
         # Emergency Response Tab
-        emergency_frame = tk.Frame(self.notebook, bg='#2a2a2a')
-        self.notebook.add(emergency_frame, text='Emergency Response')
         
         # Emergency status
         status_frame = tk.LabelFrame(emergency_frame, text="Emergency Status", 
                                     fg='white', bg='#2a2a2a')
         status_frame.pack(fill='x', padx=10, pady=10)
         
-        self.emergency_status_label = tk.Label(status_frame, text="No Emergency Detected", 
-                                              font=('Arial', 14, 'bold'), fg='green', bg='#2a2a2a')
+        self.emergency_status_label = tk.Label(status_frame, text=self.emergency_status[0], 
+                                              font=('Arial', 14, 'bold'), fg=self.emergency_status[1],
+                                              bg='#2a2a2a')
         self.emergency_status_label.pack(pady=10)
         
         # Emergency actions
@@ -192,6 +402,9 @@ class DriverMonitoringSystem:
         self.actions_text = tk.Text(actions_frame, bg='#1a1a1a', fg='white', 
                                    font=('Courier', 10))
         self.actions_text.pack(fill='both', expand=True, padx=5, pady=5)
+        self.actions_text.insert(tk.END, ''.join(self._pending_actions))
+        self.actions_text.see(tk.END)
+        self._pending_actions.clear()
         
         # Emergency contacts
         contacts_frame = tk.LabelFrame(emergency_frame, text="Emergency Contacts", 
@@ -204,10 +417,11 @@ class DriverMonitoringSystem:
             tk.Label(contact_frame, text=contact, fg='white', bg='#2a2a2a').pack(side='left')
             tk.Label(contact_frame, text="● Ready", fg='green', bg='#2a2a2a').pack(side='right')
         
-    def create_route_tab(self):
+    def create_route_tab(self, route_frame):
         # Autonomous Route Tab
-        route_frame = tk.Frame(self.notebook, bg='#2a2a2a')
-        self.notebook.add(route_frame, text='Autonomous Routing')
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from live_map import LiveRouteMap
         
         # Route information
         info_frame = tk.LabelFrame(route_frame, text="Route Information", 
@@ -216,6 +430,7 @@ class DriverMonitoringSystem:
         
         self.route_info_text = tk.Text(info_frame, height=8, bg='#1a1a1a', fg='white')
         self.route_info_text.pack(fill='x', padx=5, pady=5)
+        self.route_info_text.insert(1.0, self.route_info)
         
         # Map placeholder (would integrate with folium/webview)
         map_frame = tk.LabelFrame(route_frame, text="Live Route Map", 
@@ -223,10 +438,13 @@ class DriverMonitoringSystem:
         map_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Create matplotlib figure for route visualization
-        self.fig, self.ax = plt.subplots(figsize=(8, 6), facecolor='#2a2a2a')
+        self.fig = Figure(figsize=(8, 6), facecolor='#2a2a2a')
+        self.ax = self.fig.add_subplot()
         self.ax.set_facecolor('#1a1a1a')
         self.canvas = FigureCanvasTkAgg(self.fig, map_frame)
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
+        self.route_map = LiveRouteMap(self.fig, self.ax, self.canvas)
+        self.route_map.basemap_provider = self.render_basemap
         
         self.update_route_map()
         
@@ -243,10 +461,11 @@ class DriverMonitoringSystem:
         tk.Button(controls_frame, text="Continue to Destination", 
                  command=self.continue_route, bg='#4CAF50', fg='white').pack(side='left', padx=5)
         
-    def create_v2v_tab(self):
+        tk.Button(controls_frame, text="Open Map View", 
+                 command=self.open_map_view, bg='#2196F3', fg='white').pack(side='left', padx=5)
+        
+    def create_v2v_tab(self, v2v_frame):
         # V2V Communication Tab
-        v2v_frame = tk.Frame(self.notebook, bg='#2a2a2a')
-        self.notebook.add(v2v_frame, text='V2V Communication')
         
         # Nearby vehicles
         vehicles_frame = tk.LabelFrame(v2v_frame, text="Nearby Vehicles", 
@@ -272,6 +491,9 @@ class DriverMonitoringSystem:
         self.comm_text = tk.Text(comm_frame, bg='#1a1a1a', fg='white', font=('Courier', 9))
         comm_scrollbar = tk.Scrollbar(comm_frame, command=self.comm_text.yview)
         self.comm_text.configure(yscrollcommand=comm_scrollbar.set)
+        self.comm_text.insert(tk.END, ''.join(self._pending_comms))
+        self.comm_text.see(tk.END)
+        self._pending_comms.clear()
         
         self.comm_text.pack(side='left', fill='both', expand=True, padx=5, pady=5)
         comm_scrollbar.pack(side='right', fill='y')
@@ -286,10 +508,11 @@ class DriverMonitoringSystem:
         tk.Button(v2v_controls, text="Request Safe Passage", 
                  command=self.request_safe_passage, bg='#FF9800', fg='white').pack(side='left', padx=5)
         
-    def create_settings_tab(self):
+        tk.Button(v2v_controls, text="Simulate Incoming Alert", 
+                 command=self.simulate_v2v_alert, bg='#2196F3', fg='white').pack(side='left', padx=5)
+        
+    def create_settings_tab(self, settings_frame):
         # Settings Tab
-        settings_frame = tk.Frame(self.notebook, bg='#2a2a2a')
-        self.notebook.add(settings_frame, text='Settings')
         
         # API Configuration
         api_frame = tk.LabelFrame(settings_frame, text="API Configuration", 
@@ -318,10 +541,30 @@ class DriverMonitoringSystem:
         
         tk.Label(vehicle_frame, text="Maximum Speed (Autonomous):", 
                 fg='white', bg='#2a2a2a').pack(anchor='w')
-        self.max_speed_var = tk.StringVar(value="35")
+        self.max_speed_var = tk.StringVar(value=str(self.perf.max_speed))
         tk.Scale(vehicle_frame, from_=10, to=60, orient='horizontal', 
                 variable=self.max_speed_var, bg='#2a2a2a', fg='white').pack(fill='x')
         
+        # Performance settings (also editable in data/perf_config.json while running)
+        perf_frame = tk.LabelFrame(settings_frame, text="Performance Settings", 
+                                  fg='white', bg='#2a2a2a')
+        perf_frame.pack(fill='x', padx=10, pady=10)
+        
+        tk.Label(perf_frame, text="Frame Rate at Normal Risk (FPS):", 
+                fg='white', bg='#2a2a2a').pack(anchor='w')
+        self.capture_fps_var = tk.StringVar(value=str(self.perf.capture_fps))
+        # Bounded by min_fps..max_fps, which save_settings validates against
+        self.capture_fps_scale = tk.Scale(perf_frame, from_=self.perf.min_fps, to=self.perf.max_fps,
+                                          orient='horizontal', variable=self.capture_fps_var,
+                                          bg='#2a2a2a', fg='white')
+        self.capture_fps_scale.pack(fill='x')
+        
+        tk.Label(perf_frame, text="Eye Check Every N Frames:", 
+                fg='white', bg='#2a2a2a').pack(anchor='w')
+        self.eye_every_var = tk.StringVar(value=str(self.perf.eye_every))
+        tk.Scale(perf_frame, from_=1, to=15, orient='horizontal', 
+                variable=self.eye_every_var, bg='#2a2a2a', fg='white').pack(fill='x')
+        
         # Save settings button
         tk.Button(settings_frame, text="Save Settings", command=self.save_settings, 
                  bg='#4CAF50', fg='white').pack(pady=10)
@@ -331,56 +574,76 @@ class DriverMonitoringSystem:
             if self.cap is not None:
                 self.cap.release()
             
-            self.cap = cv2.VideoCapture(0)
+            self.cap = cv2.VideoCapture(self.video_source)
             # Set camera properties for better performance
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.cap.set(cv2.CAP_PROP_FPS, 15)  # Reduced FPS for better performance
+            # Opened at the highest rate the governor may ask for; the loop decides how many frames to process
+            self.cap.set(cv2.CAP_PROP_FPS, self.perf.max_fps)
             self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer size
             
             if not self.cap.isOpened():
-                messagebox.showerror("Error", "Could not open camera")
+                self.show_error("Could not open camera")
                 return
                 
             self.monitoring_active = True
-            self.camera_label.configure(text="Starting camera...", fg='white')
+            self._camera_started_at = time.perf_counter()
+            self.set_camera_text("Starting camera...")
             self.root.after(100, self.update_camera_feed)  # Start after small delay
             
         except Exception as e:
-            messagebox.showerror("Error", f"Camera error: {str(e)}")
+            self.show_error(f"Camera error: {str(e)}")
+    
+    def show_error(self, message):
+        if self.headless:
+            self.log_action(f"Error: {message}")
+        else:
+            messagebox.showerror("Error", message)
+    
+    def set_camera_text(self, text, color='white'):
+        if self.camera_label is not None:
+            self.camera_label.configure(image='', text=text, fg=color)
+            self.camera_label.image = None
     
     def stop_camera(self):
         self.monitoring_active = False
         if self.cap:
             self.cap.release()
             self.cap = None
-        self.camera_label.configure(image='', bg='black')
+        if self.camera_label is not None:
+            self.camera_label.configure(image='', bg='black')
+            self.camera_label.image = None
     
     def update_camera_feed(self):
         if self.monitoring_active and self.cap and self.cap.isOpened():
+            if self.face_cascade is None:
+                # Still warming up in the background (or the models failed to load)
+                self.set_camera_text("Detector unavailable" if self.detector_ready.is_set()
+                                     else "Loading detection models...")
+                self.root.after(self.governor.delay_ms(), self.update_camera_feed)
+                return
             ret, frame = self.cap.read()
+            started = time.perf_counter()
             if ret:
+                trace = self.latency.start()
+                perf = self.perf   # one consistent set of knobs for this frame
+                
                 # Flip frame horizontally for mirror effect
                 frame = cv2.flip(frame, 1)
                 
-                # Get label dimensions for proper scaling
-                label_width = self.camera_label.winfo_width()
-                label_height = self.camera_label.winfo_height()
-                
-                # Set minimum size if label not yet rendered
-                if label_width <= 1:
-                    label_width = 480
-                if label_height <= 1:
-                    label_height = 360
-                
-                # Face detection (optimized)
+                # Face detection (optimized): only the seat ROI, with periodic full-frame checks
                 gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                # Scale down for detection to improve performance
-                small_gray = cv2.resize(gray, (320, 240))
-                faces = self.face_cascade.detectMultiScale(small_gray, 1.2, 4, minSize=(30, 30))
-                
-                # Scale back face coordinates
-                faces = [(int(x*2), int(y*2), int(w*2), int(h*2)) for (x, y, w, h) in faces]
+                frame_size = (gray.shape[1], gray.shape[0])
+                region = self.seat_roi.region(frame_size, perf.roi_full_every)
+                faces = self.detect_faces(gray, perf, region)
+                missed = None
+                if region is not None and not faces:
+                    # Never call the driver missing from the crop alone
+                    missed, region = region, None
+                    faces = self.detect_faces(gray, perf)
+                roi_message = self.seat_roi.observe(faces, frame_size, region, missed=missed)
+                if roi_message:
+                    self.log_action(roi_message)
                 
                 consciousness_detected = len(faces) > 0
                 
@@ -394,10 +657,12 @@ class DriverMonitoringSystem:
                     else:
                         self._eye_detection_counter = 0
                     
-                    # Only do eye detection every 5 frames
-                    if self._eye_detection_counter % 5 == 0:
+                    # Only do eye detection every few frames
+                    if self._eye_detection_counter % perf.eye_every == 0:
                         try:
-                            eyes = self.eye_cascade.detectMultiScale(roi_gray, 1.1, 3, minSize=(10, 10))
+                            eyes = self.eye_cascade.detectMultiScale(roi_gray, perf.eye_scale_factor,
+                                                                     perf.eye_min_neighbors,
+                                                                     minSize=(perf.min_eye, perf.min_eye))
                             self._eyes_detected = len(eyes) >= 1
                         except:
                             self._eyes_detected = True
@@ -410,50 +675,117 @@ class DriverMonitoringSystem:
                                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
                         consciousness_detected = False
                 
+                trace.mark('detection')
+                if self.driver_conscious and not consciousness_detected:
+                    self.slump_trace = trace
+                    self._lost_since = time.monotonic()
                 self.driver_conscious = consciousness_detected
+                if not consciousness_detected and time.monotonic() - self._lost_since >= self.slump_confirm:
+                    self.check_emergency()
                 
-                # Convert to PhotoImage and display with proper scaling
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frame_pil = Image.fromarray(frame_rgb)
-                
-                # Scale to fit label while maintaining aspect ratio
-                frame_width, frame_height = frame_pil.size
-                aspect_ratio = frame_width / frame_height
-                
-                if label_width / label_height > aspect_ratio:
-                    # Fit to height
-                    new_height = label_height
-                    new_width = int(new_height * aspect_ratio)
-                else:
-                    # Fit to width
-                    new_width = label_width
-                    new_height = int(new_width / aspect_ratio)
+                if not self.headless:
+                    self.show_frame(frame)
                 
-                frame_pil = frame_pil.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(frame_pil)
+                change = self.governor.observe(not consciousness_detected, self.fatigue_level,
+                                               self.emergency_detected, time.perf_counter() - started)
+                if change:
+                    self.log_action(f"Camera rate {change[0]} -> {change[1]} FPS ({change[2]})")
                 
-                self.camera_label.configure(image=photo, text="")
-                self.camera_label.image = photo
+                if self._camera_started_at is not None:
+                    self.mark_startup("first camera frame")
+                    self.log_action(f"First camera frame {(time.perf_counter() - self._camera_started_at) * 1000:.0f} ms "
+                                    f"after Start Camera")
+                    self._camera_started_at = None
             else:
                 # If frame read fails, show error message
-                self.camera_label.configure(image="", text="Camera Error", fg='red')
+                self.set_camera_text("Camera Error", 'red')
             
-            # Reduced update frequency for better performance
-            self.root.after(66, self.update_camera_feed)  # ~15 FPS
+            # Next frame at the governed rate, net of the time this one took
+            self.root.after(self.governor.delay_ms(time.perf_counter() - started), self.update_camera_feed)
         else:
-            self.camera_label.configure(image="", text="Camera Stopped", fg='white')
+            self.set_camera_text("Camera Stopped")
+    
+    def detect_faces(self, gray, perf, region=None):
+        # Face boxes in full-frame pixels. The crop is scaled like the full frame
+        # would be, so min_face means the same thing either way.
+        x0, y0, w0, h0 = region or (0, 0, gray.shape[1], gray.shape[0])
+        fx, fy = perf.detect_width / gray.shape[1], perf.detect_height / gray.shape[0]
+        small_gray = cv2.resize(gray[y0:y0+h0, x0:x0+w0], (max(1, int(w0*fx)), max(1, int(h0*fy))))
+        faces = self.face_cascade.detectMultiScale(small_gray, perf.scale_factor, perf.min_neighbors,
+                                                   minSize=(perf.min_face, perf.min_face))
+        return [(x0 + int(x/fx), y0 + int(y/fy), int(w/fx), int(h/fy)) for (x, y, w, h) in faces]
+    
+    def show_frame(self, frame):
+        # Get label dimensions for proper scaling
+        label_width = self.camera_label.winfo_width()
+        label_height = self.camera_label.winfo_height()
+        
+        # Set minimum size if label not yet rendered
+        if label_width <= 1:
+            label_width = 480
+        if label_height <= 1:
+            label_height = 360
+        
+        # Convert to PhotoImage and display with proper scaling
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame_pil = Image.fromarray(frame_rgb)
+        
+        # Scale to fit label while maintaining aspect ratio
+        frame_width, frame_height = frame_pil.size
+        aspect_ratio = frame_width / frame_height
+        
+        if label_width / label_height > aspect_ratio:
+            # Fit to height
+            new_height = label_height
+            new_width = int(new_height * aspect_ratio)
+        else:
+            # Fit to width
+            new_width = label_width
+            new_height = int(new_width / aspect_ratio)
+        
+        frame_pil = frame_pil.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        
+        # Paint into the existing Tk image; a new PhotoImage per frame churns Tk image objects
+        photo = getattr(self.camera_label, 'image', None)
+        if photo is not None and (photo.width(), photo.height()) == frame_pil.size:
+            photo.paste(frame_pil)
+        else:
+            photo = ImageTk.PhotoImage(frame_pil)
+            self.camera_label.configure(image=photo, text="")
+            self.camera_label.image = photo
     
     def start_monitoring_thread(self):
         def monitor():
             while True:
                 self.update_system_status()
                 self.simulate_vitals()
+                self.vitals_history.append((time.time(), self.heart_rate, self.fatigue_level))
+                self.update_vehicle_positions()
+                if self.autonomous_mode:
+                    self.reroute()
+                # LiveRouteMap (blits, widget.after) is only ever used from the Tk thread
+                self.root.after(0, self.update_map_position)
                 time.sleep(1)
         
         monitoring_thread = threading.Thread(target=monitor, daemon=True)
         monitoring_thread.start()
     
     def update_system_status(self):
+        if not self.headless:
+            self.show_status()
+        self.check_emergency()
+    
+    def check_emergency(self):
+        # Check for emergency conditions
+        with self._emergency_lock:
+            if not self.driver_conscious or self.heart_rate > 120 or self.heart_rate < 50:
+                if not self.emergency_detected:
+                    # Carry the stamp of the slump frame; vitals-only emergencies start here
+                    trace = self.slump_trace if not self.driver_conscious and self.slump_trace else self.latency.start()
+                    trace.mark('decision')
+                    self.trigger_emergency(trace)
+    
+    def show_status(self):
         # Update status indicators
         self.status_labels["monitoring_status"].configure(
             fg='green' if self.monitoring_active else 'red')
@@ -467,11 +799,6 @@ class DriverMonitoringSystem:
         # Update vital signs
         self.heart_rate_label.configure(text=f"Heart Rate: {self.heart_rate} BPM")
         self.fatigue_label.configure(text=f"Fatigue Level: {self.fatigue_level}%")
-        
-        # Check for emergency conditions
-        if not self.driver_conscious or self.heart_rate > 120 or self.heart_rate < 50:
-            if not self.emergency_detected:
-                self.trigger_emergency()
     
     def simulate_vitals(self):
         if not self.emergency_detected:
@@ -495,116 +822,533 @@ class DriverMonitoringSystem:
     
     def reset_to_normal(self):
         self.driver_conscious = True
+        self.slump_trace = None
         self.emergency_detected = False
         self.autonomous_mode = False
         self.heart_rate = 72
         self.fatigue_level = 10
-        self.emergency_status_label.configure(text="No Emergency Detected", fg='green')
+        self.nearby_vehicles.mark_alerted(False)
+        self.request_checkpoint()
+        self.set_emergency_status("No Emergency Detected", 'green')
         self.log_action("System reset to normal operation")
     
-    def trigger_emergency(self):
+    def trigger_emergency(self, trace=None):
+        trace = trace or self.latency.start()
+        trace.mark('trigger')
         self.emergency_detected = True
         self.autonomous_mode = True
-        self.emergency_status_label.configure(text="EMERGENCY DETECTED - AUTONOMOUS MODE ACTIVE", 
-                                            fg='red')
+        self.request_checkpoint()
         
+        if not self.driver_conscious:
+            alert = 'unconscious_detected'
+        elif self.heart_rate > 120 or self.heart_rate < 50:
+            alert = 'heartbeat_warning'
+        else:
+            alert = 'emergency_alert'
+        
+        # Time-critical actions start together, each with its own deadline and
+        # fallback; the UI catches up once all of them have finished or fallen back
+        self.emergency_pipeline.run([
+            Stage('alert_audio', lambda: self.sound_alert(alert, trace), 0.1,
+                  lambda: self.root.after(0, self.root.bell)),
+            Stage('v2v_broadcast', lambda: self.send_emergency_broadcast(trace), 0.25, self.retry_broadcast),
+            Stage('hospital_search', lambda: self.plan_hospital_route(trace), 2.0, self.fallback_hospital),
+            Stage('contact_notification', self.notify_contacts, 3.0, self.queue_contact_retry),
+        ], on_done=lambda results: self.root.after(0, self.show_emergency_response, results))
+        
+        self.root.after(0, self.set_emergency_status, "EMERGENCY DETECTED - AUTONOMOUS MODE ACTIVE", 'red')
         self.log_action("🚨 EMERGENCY DETECTED!")
         self.log_action("→ Engaging autonomous driving mode")
         self.log_action("→ Reducing speed to safe level")
         self.log_action("→ Broadcasting V2V emergency alert")
         self.log_action("→ Calculating route to nearest hospital")
         self.log_action("→ Notifying emergency contacts")
-        
-        # Trigger V2V alert
-        self.broadcast_emergency()
-        
-        # Find nearest hospital
-        self.find_nearest_hospital()
+    
+    def sound_alert(self, alert, trace=None):
+        if not self.alerts.ready:
+            raise RuntimeError("audio not ready")
+        self.alerts.trigger(alert, trace)
+        self.alerts.trigger('autonomous_engaged')
+    
+    def get_notifier(self):
+        with self._notifier_lock:
+            if self.notifier is None and self.contacts_path and os.path.exists(self.contacts_path):
+                try:
+                    from contact_notifier import ContactNotifier
+                    self.notifier = ContactNotifier.from_json(self.contacts_path, self.outbox_path)
+                    self.emergency_contacts = [contact.name for contact in self.notifier.contacts]
+                    self.notifier.start_retry_loop(
+                        on_flush=lambda sent, left: self.log_action(f"Outbox: {sent} delivered, {left} pending"))
+                except Exception as e:
+                    self.log_action(f"Contact notifier unavailable: {str(e)}")
+                    self.contacts_path = None
+            return self.notifier
+    
+    def notify_contacts(self):
+        notifier = self.get_notifier()
+        if notifier is None:
+            # No endpoints configured: nothing to send, record the intent only
+            for contact in self.emergency_contacts:
+                self.log_action(f"→ Notified {contact} (no endpoint configured)")
+            return list(self.emergency_contacts)
+        deliveries = notifier.notify({
+            'type': 'emergency',
+            'vehicle': self.vehicle_id,
+            'location': list(self.current_location),
+            'hospital': self.hospital_name,
+            'heart_rate': self.heart_rate,
+            'time': datetime.now().isoformat(timespec='seconds'),
+        })
+        for delivery in deliveries:
+            if delivery.ok:
+                self.log_action(f"→ Notified {delivery.contact.name} ({delivery.elapsed_ms:.0f} ms)")
+            else:
+                self.log_action(f"⚠ {delivery.contact.name} unreachable ({delivery.error}) - queued in outbox")
+        return [delivery.contact.name for delivery in deliveries if delivery.ok]
+    
+    def queue_contact_retry(self):
+        if self.notifier is not None:
+            # The send keeps going in the background; failures land in the outbox
+            self.log_action("⚠ Contact notification slow - undelivered messages will be retried from the outbox")
+            return
+        self.log_action("⚠ Contact notification timed out - retrying in 10 s")
+        self.root.after(10000, lambda: threading.Thread(target=self.notify_contacts, daemon=True).start())
+    
+    def retry_broadcast(self):
+        self.log_communication("⚠ V2V broadcast missed its deadline - retrying")
+        self.root.after(500, self.broadcast_emergency)
+    
+    def fallback_hospital(self):
+        # Keep heading for the best known hospital until the search catches up
+        self.log_action(f"⚠ Hospital search slow - heading for {self.hospital_name}")
+        return self.hospital_name
+    
+    def show_emergency_response(self, results):
+        # Last and on the Tk thread: nothing time-critical waits for rendering
+        for result in results:
+            outcome = "done" if result.status == 'ok' else f"{result.status}, fallback used"
+            self.log_action(f"   {result.name}: {outcome} ({result.elapsed_ms:.0f} ms)")
+        self.update_vehicles_list()
+        self.show_hospital_route()
+        self.report_alert_latency()
+    
+    def state_snapshot(self):
+        # Flat view of the live state; the state hub sends only the keys that change
+        rows = self.nearby_vehicles.rows()
+        route = self.emergency_route if self.emergency_detected else self.destination_route
+        return {
+            'status.monitoring': self.monitoring_active,
+            'status.driver_conscious': self.driver_conscious,
+            'status.emergency': self.emergency_detected,
+            'status.autonomous': self.autonomous_mode,
+            'status.text': self.emergency_status[0],
+            'vitals.heart_rate': self.heart_rate,
+            'vitals.fatigue': self.fatigue_level,
+            'camera.fps': self.governor.fps if self.monitoring_active else 0,
+            'camera.roi': list(self.seat_roi.roi) if self.seat_roi.roi else None,
+            'vehicle.speed': self.speed,
+            'vehicle.lat': round(self.current_location[0], 6),
+            'vehicle.lon': round(self.current_location[1], 6),
+            'vehicle.heading': round(self.heading, 1),
+            'route.hospital': self.hospital_name if self.emergency_detected else None,
+            'route.eta_s': round(route.seconds) if route is not None else None,
+            'route.km': round(route.meters / 1000, 2) if route is not None else None,
+            'v2v.nearby': len(rows),
+            'v2v.alerted': sum(1 for row in rows if row[4]),
+        }
+    
+    def checkpoint_state(self):
+        # Runs on the checkpoint thread: attribute reads and one locked table copy
+        vehicle_ids, vehicles = self.nearby_vehicles.snapshot()
+        return Checkpoint(time.time(), self.emergency_detected, self.autonomous_mode, self.heart_rate,
+                          self.fatigue_level, self.speed, self.current_location[0], self.current_location[1],
+                          self.heading, self.hospital_name, self.hospital_location[0], self.hospital_location[1],
+                          self.route_info, self.emergency_route, self.destination_route, vehicle_ids, vehicles,
+                          list(self.vitals_history))
+    
+    def request_checkpoint(self):
+        # State transitions are written right away rather than at the next tick
+        if self.checkpointer is not None:
+            self.checkpointer.request()
+    
+    def shutdown(self):
+        # Camera off and a final checkpoint, so a restart resumes the state at exit
+        self.stop_camera()
+        if self.checkpointer is not None:
+            self.checkpointer.stop()
+            self.checkpointer = None
+    
+    def on_close(self):
+        self.shutdown()
+        self.root.destroy()
+    
+    def restore_checkpoint(self):
+        start = time.perf_counter()
+        cp = load_checkpoint(self.checkpoint_path, self.checkpoint_max_age)
+        if cp is None:
+            return False
+        self.emergency_detected = cp.emergency
+        self.autonomous_mode = cp.autonomous
+        self.heart_rate = int(cp.heart_rate)
+        self.fatigue_level = int(cp.fatigue)
+        self.speed = cp.speed
+        self.current_location = [cp.lat, cp.lon]
+        self.heading = cp.heading
+        self.hospital_name = cp.hospital_name
+        self.hospital_location = [cp.hospital_lat, cp.hospital_lon]
+        self.route_info = cp.route_info
+        self.emergency_route = cp.emergency_route
+        self.destination_route = cp.destination_route
+        self.nearby_vehicles.restore(cp.vehicle_ids, cp.vehicles)
+        self.update_vehicle_positions()
+        self.vitals_history.extend(tuple(row) for row in cp.vitals.tolist())
+        if cp.emergency_route is not None or cp.destination_route is not None:
+            # reroute() keeps a restored route current only once the route cache exists
+            self.get_router()
+        if cp.emergency:
+            # The response already ran before the restart; only its state comes back
+            self.set_emergency_status("EMERGENCY DETECTED - AUTONOMOUS MODE ACTIVE", 'red')
+        self.mark_startup("checkpoint restored")
+        self.log_action(f"Resumed from checkpoint saved {time.time() - cp.saved_at:.1f} s ago "
+                        f"({'emergency active' if cp.emergency else 'no emergency'}, {len(cp.vehicle_ids)} vehicles) "
+                        f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return True
+    
+    def set_emergency_status(self, text, color):
+        self.emergency_status = (text, color)
+        if self.emergency_status_label is not None:
+            self.emergency_status_label.configure(text=text, fg=color)
     
     def log_action(self, message):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.actions_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.actions_text.see(tk.END)
+        self._queue_log('actions', message)
     
     def log_communication(self, message):
+        self._queue_log('comms', message)
+    
+    def _queue_log(self, kind, message):
+        # Safe from any thread; the Tk thread writes queued lines in batches
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.comm_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.comm_text.see(tk.END)
+        self._log_queue.append((kind, f"[{timestamp}] {message}\n"))
+        if self.state_hub is not None:
+            self.state_hub.add_event(kind, message)
+        if threading.current_thread() is threading.main_thread():
+            self.flush_logs()
+        elif not self._log_flush_pending:
+            self._log_flush_pending = True
+            self.root.after(50, self.flush_logs)
+    
+    def flush_logs(self):
+        self._log_flush_pending = False
+        lines = {'actions': [], 'comms': []}
+        while self._log_queue:
+            kind, line = self._log_queue.popleft()
+            lines[kind].append(line)
+        for widget, pending, batch in [(self.actions_text, self._pending_actions, lines['actions']),
+                                       (self.comm_text, self._pending_comms, lines['comms'])]:
+            if not batch:
+                continue
+            if widget is None:
+                pending.extend(batch)
+            else:
+                widget.insert(tk.END, ''.join(batch))
+                # Keep a shift's worth of logging from growing the widget without bound
+                widget.delete('1.0', f'end-{self.max_log_lines}l')
+                widget.see(tk.END)
+    
+    def update_vehicle_positions(self):
+        for vehicle_id, distance, bearing in self.simulated_vehicles:
+            self.nearby_vehicles.add_relative(vehicle_id, distance, self.heading + bearing,
+                                              *self.current_location)
+        if self.nearby_vehicles.expire(self.vehicle_max_age):
+            # Called from the monitor thread; the vehicle list is redrawn on the Tk thread
+            self.root.after(0, self.update_vehicles_list)
+        # Distance, bearing and staleness for all neighbours in one vectorized pass
+        self.nearby_vehicles.update(self.current_location[0], self.current_location[1], self.heading)
     
     def update_vehicles_list(self):
-        # Clear existing items
-        for item in self.vehicles_tree.get_children():
-            self.vehicles_tree.delete(item)
-        
-        # Add vehicles
-        for vehicle in self.nearby_vehicles:
-            status = "Alerted" if self.emergency_detected else "Normal"
-            self.vehicles_tree.insert('', 'end', values=(
-                vehicle['id'], f"{vehicle['distance']}m", 
-                vehicle['direction'], status))
+        # Coalesce bursts of refresh requests into at most one redraw per interval
+        if self.vehicles_tree is None or self._vehicles_refresh_pending:
+            return
+        wait = self.vehicles_refresh_interval - (time.monotonic() - self._vehicles_last_refresh)
+        if wait > 0:
+            self._vehicles_refresh_pending = True
+            self.root.after(int(wait * 1000), self.refresh_vehicles_tree)
+        else:
+            self.refresh_vehicles_tree()
+    
+    def refresh_vehicles_tree(self):
+        self._vehicles_refresh_pending = False
+        self._vehicles_last_refresh = time.monotonic()
+        
+        status = "Alerted" if self.emergency_detected else "Normal"
+        rows = {}
+        for vehicle_id, distance, direction, _, _ in self.nearby_vehicles.rows():
+            rows[vehicle_id] = (vehicle_id, f"{distance:.0f}m", direction, status)
+        
+        # Remove departures
+        departed = self._vehicle_rows.keys() - rows.keys()
+        if departed:
+            self.vehicles_tree.delete(*departed)
+        
+        # Insert arrivals and touch only the cells that changed
+        columns = self.vehicles_tree['columns']
+        for vehicle_id, values in rows.items():
+            previous = self._vehicle_rows.get(vehicle_id)
+            if previous is None:
+                self.vehicles_tree.insert('', 'end', iid=vehicle_id, values=values)
+            elif previous != values:
+                for column, old, new in zip(columns, previous, values):
+                    if old != new:
+                        self.vehicles_tree.set(vehicle_id, column, new)
+        
+        self._vehicle_rows = rows
     
     def broadcast_emergency(self):
-        self.log_communication("🚨 BROADCASTING EMERGENCY ALERT TO NEARBY VEHICLES")
-        for vehicle in self.nearby_vehicles:
-            self.log_communication(f"→ Alert sent to {vehicle['id']} ({vehicle['distance']}m {vehicle['direction']})")
+        self.send_emergency_broadcast()
         self.update_vehicles_list()
     
+    def send_emergency_broadcast(self, trace=None):
+        self.log_communication("🚨 BROADCASTING EMERGENCY ALERT TO NEARBY VEHICLES")
+        self.update_vehicle_positions()
+        self.v2v_relay.originate({'type': 'emergency', 'location': list(self.current_location)})
+        self.nearby_vehicles.mark_alerted()
+        if trace is not None:
+            trace.mark('v2v_broadcast')
+    
+    def transmit_v2v(self, message):
+        # Radio hook for the relay; one broadcast reaches every vehicle in range
+        self.log_communication(f"→ {message.message_id} (ttl {message.ttl}, hop {message.hops})")
+        rows = self.nearby_vehicles.rows()
+        for vehicle_id, distance, direction, _, _ in rows[:10]:
+            self.log_communication(f"→ Alert sent to {vehicle_id} ({distance:.0f}m {direction})")
+        if len(rows) > 10:
+            self.log_communication(f"→ ... and {len(rows) - 10} more vehicles")
+        # Radio stub: the simulated neighbours relay what they hear, so copies of
+        # every transmission come back and go through dedup and suppression
+        if message.ttl > 1:
+            for vehicle_id, _, _ in self.simulated_vehicles:
+                self.root.after(random.randint(2, 15), self.receive_v2v,
+                                message._replace(sender=vehicle_id, ttl=message.ttl - 1, hops=message.hops + 1))
+    
+    def simulate_v2v_alert(self):
+        # A neighbour raises an alert; the others relay it to us within the backoff
+        origin = self.simulated_vehicles[0][0]
+        message = Message(f"{origin}:{random.randrange(1 << 30)}", origin, origin, self.v2v_relay.ttl, 0,
+                          {'type': 'emergency', 'location': list(self.current_location)}, time.monotonic())
+        self.log_communication(f"SIMULATION: Emergency alert raised by {origin}")
+        self.receive_v2v(message)
+        for delay, (vehicle_id, _, _) in enumerate(self.simulated_vehicles[1:], 1):
+            self.root.after(5 * delay, self.receive_v2v,
+                            message._replace(sender=vehicle_id, ttl=message.ttl - 1, hops=1))
+    
+    def receive_v2v(self, message):
+        # Alerts relayed by other vehicles; rebroadcasts go out after a short backoff
+        if self.v2v_relay.receive(message):
+            self.root.after(int(self.v2v_relay.max_jitter * 1000) + 1, self.v2v_relay.flush)
+    
+    def on_v2v_message(self, message):
+        self.alerts.trigger('v2v_alert')
+        self.log_communication(f"📡 Alert {message.message_id} from {message.origin} "
+                               f"via {message.sender} ({message.hops + 1} hops)")
+    
     def request_safe_passage(self):
         self.log_communication("📡 Requesting safe passage from nearby vehicles")
         self.log_communication("→ Asking vehicles to maintain safe distance")
         self.log_communication("→ Requesting clear emergency lane")
     
     def update_route_map(self):
-        self.ax.clear()
-        self.ax.set_facecolor('#1a1a1a')
-        
-        # Current location
-        current_x, current_y = 0, 0
-        self.ax.scatter(current_x, current_y, c='blue', s=100, label='Current Location', marker='o')
-        
-        # Destination
-        dest_x, dest_y = 5, 3
-        self.ax.scatter(dest_x, dest_y, c='green', s=100, label='Destination', marker='s')
-        
-        # Route
-        route_x = [0, 1, 2, 3, 4, 5]
-        route_y = [0, 0.5, 1, 1.5, 2.5, 3]
-        self.ax.plot(route_x, route_y, 'g--', alpha=0.7, label='Original Route')
-        
-        if self.emergency_detected:
-            # Emergency route to hospital
-            hospital_x, hospital_y = 2, 4
-            self.ax.scatter(hospital_x, hospital_y, c='red', s=100, label='Hospital', marker='+')
-            
-            emergency_route_x = [0, 1, 2]
-            emergency_route_y = [0, 2, 4]
-            self.ax.plot(emergency_route_x, emergency_route_y, 'r-', linewidth=3, 
-                        label='Emergency Route')
-        
-        self.ax.set_xlim(-1, 6)
-        self.ax.set_ylim(-1, 5)
-        self.ax.set_xlabel('Longitude (relative)', color='white')
-        self.ax.set_ylabel('Latitude (relative)', color='white')
-        self.ax.tick_params(colors='white')
-        self.ax.legend()
-        self.ax.grid(True, alpha=0.3)
-        
-        self.canvas.draw()
+        # Artists are reused; this only swaps their data and schedules one redraw
+        if self.route_map is None:
+            return
+        if self.destination_route is not None or (
+                self.emergency_detected and self.emergency_route is not None):
+            # Routes computed on the road graph, in real coordinates (lon, lat)
+            position = (self.current_location[1], self.current_location[0])
+            original = destination = emergency = hospital = None
+            if self.destination_route is not None:
+                original = [(lon, lat) for lat, lon in self.destination_route.points]
+                destination = original[-1]
+            if self.emergency_detected and self.emergency_route is not None:
+                emergency = [(lon, lat) for lat, lon in self.emergency_route.points]
+                hospital = emergency[-1]
+            active = self.emergency_route if emergency else self.destination_route
+            self.prefetch_route_tiles(active)
+            self.route_map.set_routes(position, original, emergency, destination, hospital)
+            self.request_map_view(active)
+            return
+        
+        # Schematic view when no road graph is loaded
+        original = [(0, 0), (1, 0.5), (2, 1), (3, 1.5), (4, 2.5), (5, 3)]
+        emergency = [(0, 0), (1, 2), (2, 4)] if self.emergency_detected else None
+        hospital = (2, 4) if self.emergency_detected else None
+        self.route_map.set_routes((0, 0), original, emergency, (5, 3), hospital, relative=True)
+    
+    def get_tile_cache(self):
+        if self.tile_cache is None and self.tile_pack_path and os.path.exists(self.tile_pack_path):
+            try:
+                self.tile_cache = TileCache(TilePack(self.tile_pack_path))
+            except Exception as e:
+                self.log_action(f"Map tiles unavailable: {str(e)}")
+                self.tile_pack_path = None
+        return self.tile_cache
+    
+    def render_basemap(self, south, west, north, east):
+        cache = self.get_tile_cache()
+        return cache.render_area(south, west, north, east) if cache else None
+    
+    def prefetch_route_tiles(self, route):
+        # Warm the decoded-tile LRU along the route before the view pans there
+        cache = self.get_tile_cache()
+        if cache:
+            lons = [lon for _, lon in route.points]
+            cache.prefetch_route(route.points, cache.zoom_for(min(lons), max(lons)))
+    
+    def request_map_view(self, route):
+        # Tk thread. The remaining part of the route already rendered needs no new
+        # render; anything else replaces whatever is still waiting for the worker.
+        rendered = self._map_view_nodes
+        if rendered is not None and rendered[len(rendered) - len(route.nodes):] == route.nodes:
+            return
+        self._map_view_nodes = route.nodes
+        self._map_view_route = route
+        if self._map_view_thread is None:
+            self._map_view_thread = threading.Thread(target=self._map_view_worker, daemon=True)
+            self._map_view_thread.start()
+        self._map_view_wake.set()
+    
+    def _map_view_worker(self):
+        while True:
+            self._map_view_wake.wait()
+            self._map_view_wake.clear()
+            self.prerender_map_view(self._map_view_route)
+    
+    def prerender_map_view(self, route):
+        if not os.path.isdir(self.tiles_dir):
+            return
+        try:
+            render_folium_map(route.points, self.tiles_dir, self.map_view_path)
+        except Exception as e:
+            self.log_action(f"Map view render failed: {str(e)}")
+    
+    def open_map_view(self):
+        if not os.path.exists(self.map_view_path):
+            messagebox.showinfo("Map View", "No offline map has been rendered yet")
+            return
+        # pywebview needs its own main thread, so the window runs in a child process
+        subprocess.Popen([sys.executable, '-c',
+                          'import sys, webview; webview.create_window("Live Route Map", sys.argv[1]); webview.start()',
+                          self.map_view_path])
+    
+    def update_map_position(self):
+        # Live vehicle marker; blitted over the cached map background (Tk thread)
+        if self.route_map is None:
+            return
+        if self.destination_route is not None or (
+                self.emergency_detected and self.emergency_route is not None):
+            self.route_map.set_position(self.current_location[1], self.current_location[0])
+    
+    def get_router(self):
+        if self.router is None and self.road_graph_path and os.path.exists(self.road_graph_path):
+            try:
+                self.router = Router.load(self.road_graph_path)
+                self.route_cache = RouteCache(self.router)
+            except Exception as e:
+                self.log_action(f"Road graph unavailable: {str(e)}")
+                self.road_graph_path = None
+        return self.router
+    
+    def get_poi_index(self):
+        if self.poi_index is None and self.poi_path and os.path.exists(self.poi_path):
+            try:
+                self.poi_index = PoiIndex.load(self.poi_path)
+            except Exception as e:
+                self.log_action(f"Facility dataset unavailable: {str(e)}")
+                self.poi_path = None
+        return self.poi_index
+    
+    def get_hospital_grid(self):
+        if (self.hospital_grid is None and self.hospital_grid_path
+                and os.path.exists(self.hospital_grid_path + '.npy')):
+            try:
+                self.hospital_grid = IsochroneGrid(self.hospital_grid_path)
+            except Exception as e:
+                self.log_action(f"Hospital grid unavailable: {str(e)}")
+                self.hospital_grid_path = None
+        return self.hospital_grid
+    
+    def triage_hospital(self):
+        # O(1) lookup of the hospitals reachable fastest from the current cell
+        grid = self.get_hospital_grid()
+        reachable = grid.lookup(*self.current_location) if grid else []
+        if reachable:
+            self.hospital_name = reachable[0].name
+            self.hospital_location = [reachable[0].lat, reachable[0].lon]
+            self.log_action(f"→ Fastest reachable: {reachable[0].name} "
+                            f"(~{max(1, round(reachable[0].seconds / 60))} min)")
+        return reachable
     
     def find_nearest_hospital(self):
+        self.plan_hospital_route()
+        self.show_hospital_route()
+    
+    def plan_hospital_route(self, trace=None):
+        # Pure computation (no widgets), so it can run as an emergency stage
         self.log_action("🏥 Calculating route to nearest hospital...")
-        self.log_action("→ Found: City General Hospital (2.3 km)")
-        self.log_action("→ ETA: 4 minutes (autonomous mode)")
-        self.update_route_map()
+        reachable = self.triage_hospital()
+        if trace is not None:
+            trace.mark('hospital_lookup')
+        
+        # Ranked hospital candidates by straight-line distance
+        poi_index = self.get_poi_index()
+        candidates = poi_index.nearest(*self.current_location, k=3) if poi_index else []
+        for rank, hospital in enumerate(candidates, 1):
+            self.log_action(f"   {rank}. {hospital.name} ({hospital.distance_m / 1000:.1f} km direct)")
+        
+        # With a road graph, pick the candidate that is fastest to reach
+        router = self.get_router()
+        route = None
+        if candidates and not reachable:
+            # Straight-line nearest only when the time-ranked grid had no answer
+            self.hospital_name = candidates[0].name
+            self.hospital_location = [candidates[0].lat, candidates[0].lon]
+        if router:
+            # Time-ranked grid candidates beat straight-line ones when available
+            targets = reachable or candidates or [None]
+            for hospital in targets:
+                location = [hospital.lat, hospital.lon] if hospital else self.hospital_location
+                found = self.route_cache.route(self.current_location, location)
+                if found is not None and (route is None or found.seconds < route.seconds):
+                    route = found
+                    if hospital:
+                        self.hospital_name, self.hospital_location = hospital.name, location
+        self.emergency_route = route
+        
+        if route is not None:
+            distance = f"{route.meters / 1000:.1f} km"
+            eta = f"{max(1, round(route.seconds / 60))} minutes"
+        elif reachable:
+            # No road graph: the grid's precomputed drive time, straight-line distance
+            direct = haversine_m(*self.current_location, [reachable[0].lat], [reachable[0].lon])[0]
+            distance = f"{direct / 1000:.1f} km direct"
+            eta = f"~{max(1, round(reachable[0].seconds / 60))} minutes"
+        elif candidates:
+            # No road graph: straight-line distance at an urban average of 40 km/h
+            distance = f"{candidates[0].distance_m / 1000:.1f} km"
+            eta = f"~{max(1, round(candidates[0].distance_m / 11.1 / 60))} minutes"
+        else:
+            distance, eta = "2.3 km", "4 minutes"
+        
+        self.log_action(f"→ Found: {self.hospital_name} ({distance})")
+        self.log_action(f"→ ETA: {eta} (autonomous mode)")
         
         # Update route info
-        route_info = """
+        route_info = f"""
 EMERGENCY ROUTE TO HOSPITAL
 
-Current Location: Downtown Area
-Destination: City General Hospital
-Distance: 2.3 km
-Estimated Time: 4 minutes
+Current Location: {self.current_location[0]:.4f}, {self.current_location[1]:.4f}
+Destination: {self.hospital_name}
+Distance: {distance}
+Estimated Time: {eta}
 Route Status: Active - Autonomous Mode
 
 Emergency Services Notified: YES
@@ -615,23 +1359,114 @@ Vehicle Status:
 - Hazard lights: ON
 - Emergency beacon: ACTIVE
         """
-        self.route_info_text.delete(1.0, tk.END)
-        self.route_info_text.insert(1.0, route_info.strip())
+        self.route_info = route_info.strip()
+        return self.hospital_name
+    
+    def show_hospital_route(self):
+        self.update_route_map()
+        if self.route_info_text is not None:
+            self.route_info_text.delete(1.0, tk.END)
+            self.route_info_text.insert(1.0, self.route_info)
+    
+    def get_safe_stops(self):
+        if self.safe_stops is None and self.safe_stops_path and os.path.exists(self.safe_stops_path):
+            try:
+                router = self.get_router()
+                self.safe_stops = SafeStopIndex.from_csv(self.safe_stops_path,
+                                                         router.graph if router else None)
+            except Exception as e:
+                self.log_action(f"Safe stop dataset unavailable: {str(e)}")
+                self.safe_stops_path = None
+        return self.safe_stops
     
     def find_safe_stop(self):
         self.log_action("🛑 Finding safe stop location...")
-        self.log_action("→ Located: Emergency Pull-off Area (300m ahead)")
+        
+        # Prefer stops on the route being driven, else the nearest one ahead
+        safe_stops = self.get_safe_stops()
+        stop = None
+        if safe_stops:
+            route = self.emergency_route if self.emergency_detected else self.destination_route
+            if route is not None:
+                stop = safe_stops.ahead_on_route(route)
+            if stop is None:
+                stop = safe_stops.nearest_ahead(*self.current_location, self.heading)
+        
+        if stop is not None:
+            self.log_action(f"→ Located: {stop.name} - {stop.kind} ({stop.distance_m:.0f}m ahead)")
+        else:
+            self.log_action("→ Located: Emergency Pull-off Area (300m ahead)")
         self.log_action("→ Initiating controlled stop sequence")
     
+    def reroute(self):
+        # Called every monitor tick in autonomous mode; served from the route cache.
+        # The route is computed here, off the Tk thread, and shown on the Tk thread.
+        if self.route_cache is None:
+            return
+        if self.emergency_detected and self.emergency_route is not None:
+            route = self.route_cache.route(self.current_location, self.hospital_location)
+            if route is not None and route.nodes != self.emergency_route.nodes:
+                self.root.after(0, self.apply_reroute, True, route)
+        elif self.destination_route is not None:
+            route = self.route_cache.route(self.current_location, self.destination)
+            if route is not None and route.nodes != self.destination_route.nodes:
+                self.root.after(0, self.apply_reroute, False, route)
+    
+    def apply_reroute(self, emergency, route):
+        # Tk thread; the route being replaced may have been cleared in the meantime
+        if emergency and self.emergency_route is not None:
+            self.emergency_route = route
+        elif not emergency and self.destination_route is not None:
+            self.destination_route = route
+        else:
+            return
+        self.update_route_map()
+    
     def continue_route(self):
         if not self.emergency_detected:
             self.log_action("📍 Continuing to original destination")
+            if self.get_router():
+                self.destination_route = self.route_cache.route(self.current_location, self.destination)
+                if self.destination_route is not None:
+                    self.log_action(f"→ {self.destination_route.meters / 1000:.1f} km, "
+                                    f"ETA {max(1, round(self.destination_route.seconds / 60))} minutes")
             self.update_route_map()
     
     def save_settings(self):
+        try:
+            config = validate({'max_speed': int(float(self.max_speed_var.get())),
+                               'capture_fps': int(float(self.capture_fps_var.get())),
+                               'eye_every': int(float(self.eye_every_var.get()))}, self.perf)
+            save_config(self.config_path, config)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Settings", f"Could not save settings: {str(e)}")
+            return
+        self.config_watcher.mark_seen()
+        self.apply_perf_config(config)
         messagebox.showinfo("Settings", "Settings saved successfully!")
+    
+    def apply_perf_config(self, config):
+        # Runs on the UI thread; the camera loop picks up the new object on its next frame
+        old, self.perf = self.perf, config
+        changes = [f"{key} {getattr(old, key)} -> {getattr(config, key)}"
+                   for key in config._fields if getattr(old, key) != getattr(config, key)]
+        if not changes:
+            return
+        self.governor.configure(config.min_fps, config.capture_fps, config.max_fps)
+        if config.max_fps != old.max_fps and self.cap is not None and self.cap.isOpened():
+            self.cap.set(cv2.CAP_PROP_FPS, config.max_fps)
+        scale = getattr(self, 'capture_fps_scale', None)
+        if scale is not None:
+            # Before the value below, which the Scale would clamp to its old range
+            scale.configure(from_=config.min_fps, to=config.max_fps)
+        for key in ('max_speed', 'capture_fps', 'eye_every'):
+            var = getattr(self, f'{key}_var', None)
+            if var is not None:
+                var.set(str(getattr(config, key)))
+        self.log_action(f"Performance settings applied: {', '.join(changes)}")
 
 if __name__ == "__main__":
+    load_tk()
     root = tk.Tk()
     app = DriverMonitoringSystem(root)
     root.mainloop()
\ No newline at end of file
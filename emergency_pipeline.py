@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# run and fallback take no arguments; deadline is seconds from the pipeline start
+Stage = namedtuple('Stage', 'name run deadline fallback')
+# status: 'ok', 'timeout' or 'error' (the last two mean the fallback ran)
+StageResult = namedtuple('StageResult', 'name status value elapsed_ms')
+
+
+class StagedPipeline:
+    # Starts every stage at once on a worker pool and supervises them from a
+    # separate thread, so the caller never waits. A stage that raises or misses
+    # its deadline is replaced by its fallback; whatever it returns later is
+    # ignored. on_done gets all results once every stage is resolved.
+    def __init__(self, max_workers=8):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='emergency')
+        self.history = deque(maxlen=32)
+
+    def run(self, stages, on_done=None):
+        thread = threading.Thread(target=self._supervise, args=(list(stages), on_done), daemon=True)
+        thread.start()
+        return thread
+
+    def _supervise(self, stages, on_done):
+        start = time.perf_counter()
+        futures = {self._executor.submit(self._timed, stage.run, start): stage for stage in stages}
+        results = {}
+        pending = set(futures)
+        while pending:
+            next_deadline = min(start + futures[f].deadline for f in pending)
+            wait(pending, timeout=max(0.0, next_deadline - time.perf_counter()), return_when=FIRST_COMPLETED)
+            now = time.perf_counter()
+            for future in list(pending):
+                stage = futures[future]
+                elapsed_ms = (now - start) * 1000
+                if future.done():
+                    error = future.exception()
+                    if error is None:
+                        value, finished_ms = future.result()
+                        results[stage.name] = StageResult(stage.name, 'ok', value, finished_ms)
+                    else:
+                        results[stage.name] = self._fall_back(stage, 'error', elapsed_ms)
+                elif now >= start + stage.deadline:
+                    future.cancel()
+                    results[stage.name] = self._fall_back(stage, 'timeout', elapsed_ms)
+                else:
+                    continue
+                pending.discard(future)
+        ordered = [results[stage.name] for stage in stages]
+        self.history.append(ordered)
+        if on_done is not None:
+            on_done(ordered)
+        return ordered
+
+    @staticmethod
+    def _timed(run, start):
+        value = run()
+        return value, (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    def _fall_back(stage, status, elapsed_ms):
+        value = None
+        if stage.fallback is not None:
+            try:
+                value = stage.fallback()
+            except Exception as e:
+                value = e
+        return StageResult(stage.name, status, value, elapsed_ms)
@@ -0,0 +1,130 @@
+import random
+import sys
+import time
+from collections import deque
+
+STABLE, NORMAL, HIGH = 'stable', 'normal', 'high risk'
+
+
+class FrameGovernor:
+    # Chooses the camera-loop rate. Any risk signal (a drowsy or face-less frame,
+    # high or rising fatigue, an active emergency) jumps straight to max_fps. The
+    # rate steps back to normal_fps after `hold` quiet seconds and to min_fps after
+    # `calm_after`. Whatever the level, the rate is capped (down to min_fps) to
+    # what the measured per-frame cost fits into `busy_limit` of one core: a
+    # saturated CPU sheds frames instead of queueing them up and falling behind.
+    # A stable driver is seen up to 1/min_fps late; the app makes that up by
+    # deciding on the camera frames themselves instead of the 1 s monitor tick.
+    def __init__(self, min_fps=10, normal_fps=15, max_fps=30, hold=3.0, calm_after=10.0,
+                 fatigue_high=50, fatigue_rise=10, fatigue_window=30.0, busy_limit=0.8):
+        self.configure(min_fps, normal_fps, max_fps)
+        self.hold = hold
+        self.calm_after = calm_after
+        self.fatigue_high = fatigue_high
+        self.fatigue_rise = fatigue_rise
+        self.fatigue_window = fatigue_window
+        self.busy_limit = busy_limit
+        self.level = NORMAL
+        self.fps = normal_fps
+        self.cost = None          # smoothed seconds of work per frame
+        self._fatigue = deque()   # (t, fatigue level)
+        self._quiet_since = None
+
+    def configure(self, min_fps, normal_fps, max_fps):
+        self.min_fps = min_fps
+        self.normal_fps = normal_fps
+        self.max_fps = max_fps
+
+    def observe(self, drowsy, fatigue, emergency, cost, now=None):
+        # Call once per processed frame with the seconds it took. Returns
+        # (old_fps, new_fps, reason) when the rate changes, otherwise None.
+        now = time.monotonic() if now is None else now
+        self.cost = cost if self.cost is None else 0.8 * self.cost + 0.2 * cost
+        self._fatigue.append((now, fatigue))
+        while now - self._fatigue[0][0] > self.fatigue_window:
+            self._fatigue.popleft()
+
+        if emergency:
+            risk = 'emergency active'
+        elif drowsy:
+            risk = 'drowsy frame'
+        elif fatigue >= self.fatigue_high:
+            risk = 'high fatigue'
+        elif fatigue - min(level for _, level in self._fatigue) >= self.fatigue_rise:
+            risk = 'rising fatigue'
+        else:
+            risk = None
+
+        if risk is not None or self._quiet_since is None:
+            self._quiet_since = now
+        quiet = now - self._quiet_since
+        if risk is not None:
+            level, reason = HIGH, risk
+        elif quiet >= self.calm_after:
+            level, reason = STABLE, f'driver stable for {quiet:.0f} s'
+        elif quiet >= self.hold or self.level != HIGH:
+            level, reason = (NORMAL, 'risk cleared') if self.level == HIGH else (self.level, 'steady')
+        else:
+            level, reason = HIGH, 'holding after risk'
+
+        target = {STABLE: self.min_fps, NORMAL: self.normal_fps, HIGH: self.max_fps}[level]
+        fps = target
+        if self.cost:
+            affordable = int(self.busy_limit / self.cost)
+            if affordable < target:
+                fps = max(self.min_fps, affordable)
+                reason = f'{reason}, capped by CPU at {self.cost * 1000:.0f} ms per frame'
+        # Small load-driven wobbles are not worth a change (or a log line)
+        if level == self.level and fps != target and abs(fps - self.fps) < max(2, self.fps * 0.2):
+            return None
+        old, self.level, self.fps = self.fps, level, fps
+        return (old, fps, reason) if fps != old else None
+
+    def delay_ms(self, elapsed=0.0):
+        # Time until the next frame, counting the work already done on this one
+        return max(1, int(1000 / self.fps - elapsed * 1000))
+
+
+if __name__ == "__main__":
+    # python frame_governor.py [SECONDS] [SEED]: replay a drive with drowsy spells
+    # starting at random times and compare frames processed (a proxy for CPU and
+    # power) and onset-to-decision time against the old fixed 15 FPS loop, which
+    # only decided at the next once-a-second monitor tick
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 3600
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    confirm = 0.2   # DriverMonitoringSystem.slump_confirm
+    governor = FrameGovernor()
+    spells, t = [], 0.0
+    while True:
+        t += rng.uniform(20, 120)
+        if t >= duration:
+            break
+        spells.append((t, t + rng.uniform(3, 15)))
+        t = spells[-1][1]
+
+    t, frames, gaps, decisions, pending, seen = 0.0, 0, [], [], list(spells), None
+    while t < duration:
+        while pending and pending[0][0] <= t:
+            # Time from the driver nodding off to the first frame that sees it
+            onset = pending.pop(0)[0]
+            gaps.append(t - onset)
+            seen = (onset, t)
+        if seen is not None and t - seen[1] >= confirm:
+            decisions.append(t - seen[0])
+            seen = None
+        drowsy = any(start <= t < end for start, end in spells)
+        change = governor.observe(drowsy, 10 + 5 * (t % 600 > 300), False, 0.012, now=t)
+        if change and len(gaps) <= 3:
+            print(f"{t:7.1f} s  {change[0]:2d} -> {change[1]:2d} FPS  ({change[2]})")
+        frames += 1
+        t += governor.delay_ms() / 1000
+    fixed = duration * 15
+    fixed_gaps = [-start % (1 / 15) for start, _ in spells]
+    # Fixed loop: first frame after the onset, then the next monitor tick (random phase)
+    phase = rng.random()
+    fixed_decisions = [gap + (phase - start - gap) % 1.0 for (start, _), gap in zip(spells, fixed_gaps)]
+    print(f"{len(spells)} drowsy spells; {frames} frames processed vs {fixed:.0f} at a fixed 15 FPS "
+          f"({100 * (frames / fixed - 1):+.0f}%)")
+    for name, ours, old in (('onset-to-frame', gaps, fixed_gaps), ('onset-to-decision', decisions, fixed_decisions)):
+        print(f"{name}: worst {max(ours) * 1000:.0f} ms, mean {sum(ours) / len(ours) * 1000:.0f} ms "
+              f"(fixed 15 FPS: worst {max(old) * 1000:.0f} ms, mean {sum(old) / len(old) * 1000:.0f} ms)")
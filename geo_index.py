@@ -0,0 +1,92 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180
+
+
+def haversine_m(lat, lon, lats, lons):
+    # Great-circle distance in metres from one point to arrays of points
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - lon1
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GridIndex:
+    # Points bucketed into fixed lat/lon cells, sorted by cell key. Queries expand
+    # ring by ring around the query cell and refine candidates with haversine.
+    def __init__(self, lats, lons, cell_deg=0.01):
+        self.lats = np.ascontiguousarray(lats, dtype=np.float64)
+        self.lons = np.ascontiguousarray(lons, dtype=np.float64)
+        self.cell_deg = cell_deg
+        self._cols = int(math.ceil(360 / cell_deg))
+        self._max_ring = int(math.ceil(180 / cell_deg))
+
+        keys = self._keys(self.lats, self.lons)
+        self._order = np.argsort(keys, kind='stable')
+        self._cells, self._starts, counts = np.unique(
+            keys[self._order], return_index=True, return_counts=True)
+        self._ends = self._starts + counts
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _keys(self, lats, lons):
+        rows = np.floor((np.asarray(lats) + 90) / self.cell_deg).astype(np.int64)
+        cols = np.floor((np.asarray(lons) + 180) / self.cell_deg).astype(np.int64)
+        return rows * self._cols + cols
+
+    def _ring(self, row, col, r):
+        if r == 0:
+            return np.array([row * self._cols + col], dtype=np.int64)
+        span = np.arange(-r, r + 1)
+        side = np.arange(-r + 1, r)
+        rows = np.concatenate([np.full(len(span), row - r), np.full(len(span), row + r),
+                               row + side, row + side])
+        cols = np.concatenate([col + span, col + span,
+                               np.full(len(side), col - r), np.full(len(side), col + r)])
+        return rows * self._cols + cols
+
+    def _lookup(self, keys):
+        pos = np.minimum(np.searchsorted(self._cells, keys), len(self._cells) - 1)
+        pos = pos[self._cells[pos] == keys]
+        return [self._order[s:e] for s, e in zip(self._starts[pos], self._ends[pos])]
+
+    def nearest(self, lat, lon, k=1, max_distance_m=None, where=None):
+        # Returns (indices, distances_m) of the k closest points, nearest first.
+        # `where` optionally filters candidate indices (e.g. by category).
+        if not len(self.lats):
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        row = int(math.floor((lat + 90) / self.cell_deg))
+        col = int(math.floor((lon + 180) / self.cell_deg))
+        cell_m = self.cell_deg * METERS_PER_DEGREE * max(0.05, math.cos(math.radians(min(89.9, abs(lat) + 1))))
+
+        k = min(k, len(self.lats))
+        best = np.empty(0)
+        best_idx = np.empty(0, dtype=np.intp)
+        for r in range(self._max_ring + 1):
+            chunks = self._lookup(self._ring(row, col, r))
+            if chunks:
+                candidates = np.concatenate(chunks)
+                if where is not None:
+                    candidates = candidates[where(candidates)]
+                if len(candidates):
+                    idx = np.concatenate([best_idx, candidates])
+                    dist = np.concatenate([best, haversine_m(lat, lon, self.lats[candidates],
+                                                             self.lons[candidates])])
+                    keep = np.argsort(dist, kind='stable')[:k]
+                    best_idx, best = idx[keep], dist[keep]
+            # Everything beyond ring r is at least r cells away
+            reach = r * cell_m
+            if len(best) == k and best[-1] <= reach:
+                break
+            if max_distance_m is not None and reach > max_distance_m:
+                break
+        if max_distance_m is not None:
+            inside = best <= max_distance_m
+            best_idx, best = best_idx[inside], best[inside]
+        return best_idx, best
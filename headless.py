@@ -0,0 +1,98 @@
+import heapq
+import itertools
+import signal
+import sys
+import threading
+import time
+import traceback
+
+from state_server import StateHub, StateServer
+
+
+class HeadlessLoop:
+    # Stands in for the Tk root when there is no display: the after/after_idle
+    # timer API the app schedules its work with, run on the main thread.
+    # Safe to call from any thread, like the Tk root the app otherwise uses.
+    def __init__(self):
+        self._timers = []
+        self._ids = itertools.count(1)
+        self._cancelled = set()
+        self._cond = threading.Condition()
+        self._running = False
+
+    def after(self, ms, func=None, *args):
+        if func is None:
+            time.sleep(ms / 1000)
+            return None
+        timer_id = f"after#{next(self._ids)}"
+        with self._cond:
+            heapq.heappush(self._timers, (time.monotonic() + ms / 1000, timer_id, func, args))
+            self._cond.notify()
+        return timer_id
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, timer_id):
+        with self._cond:
+            self._cancelled.add(timer_id)
+
+    def bell(self):
+        pass
+
+    def quit(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def mainloop(self):
+        self._running = True
+        while True:
+            with self._cond:
+                while self._running and (not self._timers or self._timers[0][0] > time.monotonic()):
+                    self._cond.wait(self._timers[0][0] - time.monotonic() if self._timers else None)
+                if not self._running:
+                    return
+                _, timer_id, func, args = heapq.heappop(self._timers)
+                if timer_id in self._cancelled:
+                    self._cancelled.discard(timer_id)
+                    continue
+            try:
+                func(*args)
+            except Exception:
+                traceback.print_exc()
+
+
+def main(argv):
+    # python headless.py [--port=8765] [--host=127.0.0.1] [--video=PATH] [--rate=4]
+    options = dict(arg[2:].split('=', 1) for arg in argv[1:] if arg.startswith('--') and '=' in arg)
+    from driver_monitoring import DriverMonitoringSystem
+
+    loop = HeadlessLoop()
+    hub = StateHub()
+    server = StateServer(hub, options.get('host', '127.0.0.1'), int(options.get('port', 8765))).start()
+    app = DriverMonitoringSystem(loop, headless=True, video_source=options.get('video', 0), state_hub=hub)
+    interval = int(1000 / float(options.get('rate', 4)))
+
+    def publish():
+        hub.publish(app.state_snapshot())
+        loop.after(interval, publish)
+
+    loop.after(0, publish)
+    loop.after(0, app.start_camera)
+    # systemctl/docker stop send SIGTERM: leave the loop and clean up as for Ctrl+C
+    # (the loop's lock is reentrant, so quitting from the handler is safe)
+    signal.signal(signal.SIGTERM, lambda signum, frame: loop.quit())
+    host, port = server.address
+    print(f"Headless monitoring: http://{host}:{port}/state, ws://{host}:{port}/ws")
+    try:
+        loop.mainloop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.shutdown()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,114 @@
+import heapq
+import json
+import math
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from geo_index import GridIndex
+from poi_index import PoiIndex
+from routing import RoadGraph
+
+Reachable = namedtuple('Reachable', 'name lat lon seconds')
+
+
+def k_fastest_facilities(graph, facility_nodes, k=3):
+    # For every node, the k facilities it can drive to fastest. One multi-source
+    # Dijkstra on the reversed graph where each node may be settled by up to k
+    # distinct facilities.
+    reverse = graph.reversed()
+    indptr, indices, seconds = reverse.indptr.tolist(), reverse.indices.tolist(), reverse.seconds.tolist()
+    best = np.full((len(graph), k), -1, dtype=np.int32)
+    times = np.full((len(graph), k), np.inf, dtype=np.float32)
+    settled = [0] * len(graph)
+    seen = [set() for _ in range(len(graph))]
+
+    heap = [(0.0, node, facility) for facility, node in enumerate(facility_nodes)]
+    heapq.heapify(heap)
+    while heap:
+        d, u, facility = heapq.heappop(heap)
+        if settled[u] >= k or facility in seen[u]:
+            continue
+        seen[u].add(facility)
+        best[u, settled[u]] = facility
+        times[u, settled[u]] = d
+        settled[u] += 1
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            if settled[v] < k and facility not in seen[v]:
+                heapq.heappush(heap, (d + seconds[e], v, facility))
+    return best, times
+
+
+def build(graph, facilities, path, cell_deg=0.005, k=3):
+    # Writes <path>.npy (memory-mappable grid) and <path>.json (grid metadata)
+    facility_nodes = [graph.nearest_node(lat, lon) for lat, lon in zip(facilities.lats, facilities.lons)]
+    best, times = k_fastest_facilities(graph, facility_nodes, k)
+
+    south, north = float(graph.lats.min()), float(graph.lats.max())
+    west, east = float(graph.lons.min()), float(graph.lons.max())
+    rows = int(math.ceil((north - south) / cell_deg)) + 1
+    cols = int(math.ceil((east - west) / cell_deg)) + 1
+
+    # Each cell takes the answer of the road node nearest to its centre
+    centres_lat = south + (np.arange(rows) + 0.5) * cell_deg
+    centres_lon = west + (np.arange(cols) + 0.5) * cell_deg
+    node_index = GridIndex(graph.lats, graph.lons)
+    dtype = np.dtype([('facility', np.int32, (k,)), ('seconds', np.float32, (k,))])
+    grid = np.lib.format.open_memmap(path + '.npy', mode='w+', dtype=dtype, shape=(rows, cols))
+    for r, lat in enumerate(centres_lat):
+        for c, lon in enumerate(centres_lon):
+            idx, _ = node_index.nearest(lat, lon)
+            grid[r, c] = (best[idx[0]], times[idx[0]])
+    grid.flush()
+
+    meta = {'south': south, 'west': west, 'cell_deg': cell_deg, 'rows': rows, 'cols': cols, 'k': k,
+            'names': facilities.names.tolist(), 'lats': facilities.lats.tolist(),
+            'lons': facilities.lons.tolist()}
+    with open(path + '.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return rows, cols
+
+
+class IsochroneGrid:
+    def __init__(self, path):
+        with open(path + '.json', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.south = meta['south']
+        self.west = meta['west']
+        self.cell_deg = meta['cell_deg']
+        self.rows = meta['rows']
+        self.cols = meta['cols']
+        self.names = meta['names']
+        self.lats = meta['lats']
+        self.lons = meta['lons']
+        self.grid = np.load(path + '.npy', mmap_mode='r')
+
+    def lookup(self, lat, lon):
+        # O(1): the precomputed fastest hospitals for the cell containing (lat, lon)
+        r = int((lat - self.south) // self.cell_deg)
+        c = int((lon - self.west) // self.cell_deg)
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            return []
+        cell = self.grid[r, c]
+        return [
+            Reachable(self.names[f], self.lats[f], self.lons[f], float(t))
+            for f, t in zip(cell['facility'].tolist(), cell['seconds'].tolist())
+            if f >= 0 and t != float('inf')
+        ]
+
+
+if __name__ == "__main__":
+    # python isochrone_grid.py data/road_graph.npz data/pois.csv data/hospital_grid [cell_deg] [k]
+    if len(sys.argv) < 4:
+        print("usage: isochrone_grid.py ROAD_GRAPH POI_FILE OUTPUT_PREFIX [CELL_DEG] [K]")
+        sys.exit(1)
+    pois = PoiIndex.load(sys.argv[2])
+    hospitals = np.flatnonzero(pois.categories == 'hospital')
+    facilities = PoiIndex(pois.names[hospitals], pois.categories[hospitals],
+                          pois.lats[hospitals], pois.lons[hospitals])
+    rows, cols = build(RoadGraph.load(sys.argv[1]), facilities, sys.argv[3],
+                       float(sys.argv[4]) if len(sys.argv) > 4 else 0.005,
+                       int(sys.argv[5]) if len(sys.argv) > 5 else 3)
+    print(f"Wrote {sys.argv[3]}.npy: {rows}x{cols} cells, {len(facilities)} hospitals")
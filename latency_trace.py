@@ -0,0 +1,176 @@
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+# Hops of the emergency chain, in the order they happen. Every latency is
+# measured from the capture of the frame that started the chain.
+HOPS = ('detection', 'decision', 'trigger', 'audio', 'hospital_lookup', 'v2v_broadcast')
+DEFAULT_SLO_MS = {
+    'detection': 100,
+    'decision': 1200,   # camera loop after slump_confirm; the once-a-second monitor tick is the fallback
+    'trigger': 1250,
+    'audio': 1350,
+    'hospital_lookup': 1400,
+    'v2v_broadcast': 1500,
+}
+
+
+class Trace:
+    __slots__ = ('recorder', 'captured')
+
+    def __init__(self, recorder, captured=None):
+        self.recorder = recorder
+        self.captured = time.perf_counter() if captured is None else captured
+
+    def mark(self, hop):
+        self.recorder.observe(hop, (time.perf_counter() - self.captured) * 1000)
+
+
+class LatencyRecorder:
+    # Bounded per-hop samples of ms-since-capture; cheap enough to leave on
+    def __init__(self, slo_ms=None, window=2048):
+        self.slo_ms = dict(DEFAULT_SLO_MS if slo_ms is None else slo_ms)
+        self.window = window
+        self.samples = {hop: deque(maxlen=window) for hop in HOPS}
+        self._lock = threading.Lock()
+
+    def start(self, captured=None):
+        return Trace(self, captured)
+
+    def observe(self, hop, ms):
+        with self._lock:
+            self.samples.setdefault(hop, deque(maxlen=self.window)).append(ms)
+
+    def summary(self):
+        # hop -> (count, p50, p95, max) in ms, or None without samples
+        with self._lock:
+            samples = {hop: np.array(values) for hop, values in self.samples.items()}
+        return {hop: (len(values), float(np.percentile(values, 50)), float(np.percentile(values, 95)),
+                      float(values.max())) if len(values) else None
+                for hop, values in samples.items()}
+
+    def violations(self, percentile=95):
+        # Hops over their SLO at the given percentile; a hop that never fired counts too
+        with self._lock:
+            samples = {hop: list(values) for hop, values in self.samples.items()}
+        failed = []
+        for hop, slo in self.slo_ms.items():
+            values = samples.get(hop)
+            if not values:
+                failed.append((hop, None, slo))
+            elif np.percentile(values, percentile) > slo:
+                failed.append((hop, float(np.percentile(values, percentile)), slo))
+        return failed
+
+    def format_report(self):
+        lines = [f"{'hop':16s} {'n':>6s} {'p50':>9s} {'p95':>9s} {'max':>9s} {'slo':>7s}"]
+        for hop, stats in self.summary().items():
+            slo = self.slo_ms.get(hop)
+            slo_text = f"{slo:7.0f}" if slo is not None else f"{'-':>7s}"
+            if stats is None:
+                lines.append(f"{hop:16s} {0:6d} {'-':>9s} {'-':>9s} {'-':>9s} {slo_text}")
+            else:
+                count, p50, p95, worst = stats
+                lines.append(f"{hop:16s} {count:6d} {p50:9.1f} {p95:9.1f} {worst:9.1f} {slo_text}")
+        return "\n".join(lines)
+
+
+class ReplayCapture:
+    # Stand-in for the camera: plays a video file once, then reports closed
+    def __init__(self, path):
+        self._cap = cv2.VideoCapture(path)
+        self.finished = False
+        self.frames = 0
+
+    def isOpened(self):
+        return self._cap.isOpened() and not self.finished
+
+    def read(self):
+        ret, frame = self._cap.read()
+        if ret:
+            self.frames += 1
+        else:
+            self.finished = True
+        return ret, frame
+
+    def set(self, prop, value):
+        return self._cap.set(prop, value)
+
+    def get(self, prop):
+        return self._cap.get(prop)
+
+    def release(self):
+        self._cap.release()
+
+
+def run(video, slo_ms=None, percentile=95, reset_after=3.0, gui=False):
+    # Drives the real app on a replayed video: every emergency is left to run
+    # its course for reset_after seconds, then the system is reset for the next one.
+    # Headless by default so it runs in CI; gui=True traces the Tk build instead.
+    from driver_monitoring import DriverMonitoringSystem
+
+    if gui:
+        import tkinter as tk
+        root = tk.Tk()
+    else:
+        from headless import HeadlessLoop
+        root = HeadlessLoop()
+    # No checkpoint: a replayed emergency must not be resumed by the next run (or the car)
+    app = DriverMonitoringSystem(root, headless=not gui, checkpoint_path=None)
+    app.latency.slo_ms.update(slo_ms or {})
+    app.detector_ready.wait()
+    app.cap = ReplayCapture(video)
+    app.monitoring_active = True
+    root.after(0, app.update_camera_feed)
+
+    emergencies = []
+
+    def poll():
+        if app.emergency_detected:
+            if not emergencies or emergencies[-1][1] is not None:
+                emergencies.append([time.monotonic(), None])
+            elif time.monotonic() - emergencies[-1][0] > reset_after:
+                emergencies[-1][1] = time.monotonic()
+                app.reset_to_normal()
+        if app.cap.finished and (not app.emergency_detected or emergencies[-1][1] is not None):
+            root.quit()
+        else:
+            root.after(100, poll)
+
+    root.after(100, poll)
+    root.mainloop()
+    if gui:
+        root.destroy()
+
+    print(f"Replayed {app.cap.frames} frames, {len(emergencies)} emergencies")
+    print(app.latency.format_report())
+    failed = app.latency.violations(percentile)
+    for hop, measured, slo in failed:
+        measured_text = "no samples" if measured is None else f"p{percentile:g} {measured:.1f} ms"
+        print(f"SLO FAILED: {hop} {measured_text} > {slo:.0f} ms")
+    return not failed
+
+
+if __name__ == "__main__":
+    # python latency_trace.py VIDEO [hop=ms ...] [--percentile=95] [--gui]
+    # e.g. python latency_trace.py slump.mp4 decision=1000 audio=1100
+    # (no audio device: SDL_AUDIODRIVER=dummy; --gui without a display: xvfb-run)
+    if len(sys.argv) < 2:
+        print("usage: latency_trace.py VIDEO [HOP=MS ...] [--percentile=P] [--gui]")
+        sys.exit(2)
+    percentile = 95
+    slo_ms = {}
+    gui = False
+    for arg in sys.argv[2:]:
+        if arg.startswith('--percentile='):
+            percentile = float(arg.split('=', 1)[1])
+        elif arg == '--gui':
+            gui = True
+        else:
+            hop, ms = arg.split('=', 1)
+            slo_ms[hop] = float(ms)
+    sys.exit(0 if run(sys.argv[1], slo_ms, percentile, gui=gui) else 1)
@@ -0,0 +1,124 @@
+import time
+
+import numpy as np
+from matplotlib.transforms import Bbox
+
+
+class LiveRouteMap:
+    # Route map that builds its artists once. Route changes (rare) update artist
+    # data and trigger one full draw; position updates (1-10 Hz) restore the cached
+    # background and blit only the area around the vehicle marker.
+    def __init__(self, fig, ax, canvas, fps=10):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.widget = canvas.get_tk_widget()
+        self.frame_interval = 1.0 / fps
+        self._background = None
+        self._last_frame = 0.0
+        self._frame_pending = False
+        self._marker_box = None
+
+        ax.set_facecolor('#1a1a1a')
+        ax.tick_params(colors='white')
+        ax.grid(True, alpha=0.3)
+        # Offline tile background; basemap_provider(south, west, north, east) returns
+        # (RGB array, (west, east, south, north)) or None
+        self.basemap = ax.imshow(np.zeros((1, 1, 3), dtype=np.uint8), extent=(0, 1, 0, 1),
+                                 zorder=0, aspect='auto', visible=False)
+        self.basemap_provider = None
+        self.original_line, = ax.plot([], [], 'g--', alpha=0.7, label='Original Route')
+        self.emergency_line, = ax.plot([], [], 'r-', linewidth=3, label='Emergency Route')
+        self.destination_marker = ax.scatter([], [], c='green', s=100, label='Destination', marker='s')
+        self.hospital_marker = ax.scatter([], [], c='red', s=100, label='Hospital', marker='+')
+        # The only animated artist: excluded from the cached background
+        self.position_marker = ax.scatter([], [], c='blue', s=100, label='Current Location',
+                                          marker='o', animated=True)
+
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        # Every full draw refreshes the background and puts the marker back on top
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.position_marker)
+        self._marker_box = self._marker_extent()
+
+    def _marker_extent(self):
+        # Display-space box around the marker (s=100 -> 10 pt wide) plus a margin
+        offsets = self.position_marker.get_offsets()
+        if not len(offsets):
+            return None
+        x, y = self.ax.transData.transform(offsets[0])
+        radius = 5 * self.fig.dpi / 72 + 4
+        return Bbox.from_extents(x - radius, y - radius, x + radius, y + radius)
+
+    def set_routes(self, position, original=None, emergency=None, destination=None, hospital=None,
+                   relative=False):
+        # Points are (x, y) sequences; a full redraw happens once, off the hot path
+        empty = np.empty((0, 2))
+        self.original_line.set_data(*(zip(*original) if original else ([], [])))
+        self.emergency_line.set_data(*(zip(*emergency) if emergency else ([], [])))
+        self.destination_marker.set_offsets([destination] if destination is not None else empty)
+        self.hospital_marker.set_offsets([hospital] if hospital is not None else empty)
+        self.position_marker.set_offsets([position])
+
+        points = [position] + list(original or []) + list(emergency or [])
+        points += [p for p in (destination, hospital) if p is not None]
+        xs, ys = zip(*points)
+        pad_x = max(1e-3, (max(xs) - min(xs)) * 0.1)
+        pad_y = max(1e-3, (max(ys) - min(ys)) * 0.1)
+        west, east = min(xs) - pad_x, max(xs) + pad_x
+        south, north = min(ys) - pad_y, max(ys) + pad_y
+
+        basemap = None
+        if self.basemap_provider is not None and not relative:
+            basemap = self.basemap_provider(south, west, north, east)
+        if basemap is not None:
+            image, extent = basemap
+            self.basemap.set_data(image)
+            self.basemap.set_extent(extent)
+        self.basemap.set_visible(basemap is not None)
+
+        self.ax.set_xlim(west, east)
+        self.ax.set_ylim(south, north)
+
+        suffix = ' (relative)' if relative else ''
+        self.ax.set_xlabel('Longitude' + suffix, color='white')
+        self.ax.set_ylabel('Latitude' + suffix, color='white')
+        shown = [(self.position_marker, True),
+                 (self.destination_marker, destination is not None),
+                 (self.original_line, bool(original)),
+                 (self.hospital_marker, hospital is not None),
+                 (self.emergency_line, bool(emergency))]
+        self.ax.legend(handles=[artist for artist, visible in shown if visible])
+        self.canvas.draw_idle()
+
+    def set_position(self, x, y):
+        self.position_marker.set_offsets([(x, y)])
+        self.request_frame()
+
+    def request_frame(self):
+        # Throttle blits to the target frame rate; bursts collapse into one frame
+        if self._frame_pending:
+            return
+        wait = self.frame_interval - (time.monotonic() - self._last_frame)
+        if wait > 0:
+            self._frame_pending = True
+            self.widget.after(int(wait * 1000), self._blit_frame)
+        else:
+            self._blit_frame()
+
+    def _blit_frame(self):
+        self._frame_pending = False
+        self._last_frame = time.monotonic()
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.position_marker)
+        # Blit the union of where the marker was and where it is now
+        previous, current = self._marker_box, self._marker_extent()
+        self._marker_box = current
+        boxes = [b for b in (previous, current) if b is not None]
+        if boxes:
+            self.canvas.blit(Bbox.union(boxes))
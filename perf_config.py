@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+# Immutable: the pipeline reads one PerfConfig per frame and a reload swaps the
+# whole object, so a frame never sees half of an update
+PerfConfig = namedtuple('PerfConfig', [
+    'max_speed',          # mph, autonomous mode
+    'capture_fps',        # camera-loop rate while the driver looks normal
+    'min_fps',            # rate once the driver has been stable for a while
+    'max_fps',            # rate under risk; also what the camera is opened at
+    'detect_width',       # face detection runs on a downscaled frame
+    'detect_height',
+    'scale_factor',       # face cascade detectMultiScale parameters
+    'min_neighbors',
+    'min_face',           # px at detection size
+    'roi_full_every',     # full-frame face search every Nth frame once the seat ROI is learned
+    'eye_scale_factor',   # eye cascade parameters
+    'eye_min_neighbors',
+    'min_eye',            # px at full size
+    'eye_every',          # run the eye cascade on every Nth face
+])
+
+DEFAULTS = PerfConfig(max_speed=35, capture_fps=15, min_fps=10, max_fps=30, detect_width=320, detect_height=240,
+                      scale_factor=1.2, min_neighbors=4, min_face=30, roi_full_every=30, eye_scale_factor=1.1,
+                      eye_min_neighbors=3, min_eye=10, eye_every=5)
+
+# (type, min, max) per field
+LIMITS = {
+    'max_speed': (int, 10, 60),
+    'capture_fps': (int, 1, 60),
+    'min_fps': (int, 1, 60),
+    'max_fps': (int, 1, 60),
+    'detect_width': (int, 80, 1920),
+    'detect_height': (int, 60, 1080),
+    'scale_factor': (float, 1.01, 2.0),
+    'min_neighbors': (int, 1, 20),
+    'min_face': (int, 10, 400),
+    'roi_full_every': (int, 1, 600),
+    'eye_scale_factor': (float, 1.01, 2.0),
+    'eye_min_neighbors': (int, 1, 20),
+    'min_eye': (int, 4, 200),
+    'eye_every': (int, 1, 100),
+}
+
+
+def validate(values, base=DEFAULTS):
+    # Merge over base; unknown keys and out-of-range values raise ValueError
+    unknown = set(values) - set(PerfConfig._fields)
+    if unknown:
+        raise ValueError(f"unknown settings: {', '.join(sorted(unknown))}")
+    merged = base._asdict()
+    for key, value in values.items():
+        kind, low, high = LIMITS[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{key} must be a number")
+        value = kind(value)
+        if not low <= value <= high:
+            raise ValueError(f"{key}={value} outside {low}..{high}")
+        merged[key] = value
+    if not merged['min_fps'] <= merged['capture_fps'] <= merged['max_fps']:
+        raise ValueError("need min_fps <= capture_fps <= max_fps")
+    return PerfConfig(**merged)
+
+
+def load_config(path, base=DEFAULTS):
+    if not os.path.exists(path):
+        return base
+    with open(path, encoding='utf-8') as f:
+        return validate(json.load(f), base)
+
+
+def save_config(path, config):
+    # Atomic replace so the watcher (or a crash) never sees a half-written file
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(config._asdict(), f, indent=2)
+    os.replace(tmp, path)
+
+
+class ConfigWatcher:
+    # Polls the file's mtime/size and calls on_change(config) with every valid
+    # new version; invalid edits go to on_error and the old config stays live
+    def __init__(self, path, on_change, on_error=None, interval=1.0):
+        self.path = path
+        self.on_change = on_change
+        self.on_error = on_error
+        self.interval = interval
+        self._stamp = self._current_stamp()
+
+    def _current_stamp(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def mark_seen(self):
+        # After writing the file ourselves, so our own save is not reported back
+        self._stamp = self._current_stamp()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            stamp = self._current_stamp()
+            if stamp == self._stamp or stamp is None:
+                continue
+            self._stamp = stamp
+            try:
+                config = load_config(self.path)
+            except (OSError, ValueError) as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+                continue
+            self.on_change(config)
@@ -0,0 +1,86 @@
+import csv
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from geo_index import GridIndex
+
+Facility = namedtuple('Facility', 'name category lat lon distance_m')
+
+
+class PoiIndex:
+    # Facilities (hospitals, police, fire stations, ...) held as flat arrays with
+    # one spatial grid per category, so a category query never scans the others.
+    def __init__(self, names, categories, lats, lons, cell_deg=0.05):
+        self.names = np.asarray(names)
+        self.categories = np.asarray(categories)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self._grids = {}
+        for category in np.unique(self.categories):
+            members = np.flatnonzero(self.categories == category)
+            self._grids[str(category)] = (members, GridIndex(self.lats[members], self.lons[members],
+                                                             cell_deg))
+
+    def __len__(self):
+        return len(self.lats)
+
+    @classmethod
+    def from_csv(cls, path):
+        # name,category,lat,lon
+        names, categories, lats, lons = [], [], [], []
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                names.append(row['name'])
+                categories.append(row['category'].strip().lower())
+                lats.append(float(row['lat']))
+                lons.append(float(row['lon']))
+        return cls(names, categories, lats, lons)
+
+    @classmethod
+    def load(cls, path):
+        # A .npz next to the CSV is used (and refreshed) as a fast-loading cache
+        if path.endswith('.csv'):
+            cache = path[:-4] + '.npz'
+            if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+                return cls.load(cache)
+            index = cls.from_csv(path)
+            index.save(cache)
+            return index
+        data = np.load(path, allow_pickle=False)
+        return cls(data['names'], data['categories'], data['lats'], data['lons'])
+
+    def save(self, path):
+        np.savez(path, names=self.names.astype(str), categories=self.categories.astype(str),
+                 lats=self.lats, lons=self.lons)
+
+    def nearest(self, lat, lon, k=5, category='hospital', max_distance_m=None):
+        # Ranked list of the k closest facilities of a category
+        if category not in self._grids:
+            return []
+        members, grid = self._grids[category]
+        idx, dist = grid.nearest(lat, lon, k, max_distance_m)
+        rows = members[idx]
+        return [
+            Facility(str(self.names[i]), category, float(self.lats[i]), float(self.lons[i]), float(d))
+            for i, d in zip(rows, dist)
+        ]
+
+
+if __name__ == "__main__":
+    # python poi_index.py data/pois.csv LAT LON [CATEGORY] [K]
+    if len(sys.argv) < 4:
+        print("usage: poi_index.py POI_FILE LAT LON [CATEGORY] [K]")
+        sys.exit(1)
+    index = PoiIndex.load(sys.argv[1])
+    category = sys.argv[4] if len(sys.argv) > 4 else 'hospital'
+    k = int(sys.argv[5]) if len(sys.argv) > 5 else 5
+    start = time.perf_counter()
+    found = index.nearest(float(sys.argv[2]), float(sys.argv[3]), k, category)
+    elapsed = (time.perf_counter() - start) * 1e6
+    for rank, facility in enumerate(found, 1):
+        print(f"{rank}. {facility.name} ({facility.distance_m / 1000:.2f} km)")
+    print(f"{len(index)} facilities, query took {elapsed:.0f} us")
@@ -0,0 +1,115 @@
+import math
+import threading
+from collections import OrderedDict
+
+from routing import Route
+
+
+class CachedRoute:
+    __slots__ = ('nodes', 'costs', 'position', 'cum_seconds', 'cum_meters', 'points')
+
+    def __init__(self, nodes, costs, graph):
+        # costs[i] is (seconds, meters) of the edge nodes[i] -> nodes[i + 1]
+        self.nodes = nodes
+        self.costs = costs
+        self.position = {}
+        for i, node in enumerate(nodes):
+            self.position.setdefault(node, i)
+        self.cum_seconds = [0.0]
+        self.cum_meters = [0.0]
+        for seconds, meters in costs:
+            self.cum_seconds.append(self.cum_seconds[-1] + seconds)
+            self.cum_meters.append(self.cum_meters[-1] + meters)
+        self.points = list(zip(graph.lats[nodes].tolist(), graph.lons[nodes].tolist()))
+
+    def suffix(self, i):
+        return Route(self.nodes[i:], self.cum_seconds[-1] - self.cum_seconds[i],
+                     self.cum_meters[-1] - self.cum_meters[i], self.points[i:])
+
+    def remaining(self):
+        total = self.cum_seconds[-1]
+        return {node: total - self.cum_seconds[i] for node, i in self.position.items()}
+
+
+class RouteCache:
+    # LRU of routes keyed by (origin grid cell, destination node). A vehicle that
+    # is still on a cached path gets the remaining suffix for free; one that has
+    # drifted off is reconnected with a short bounded search instead of a full query.
+    # Safe to share between threads (monitor loop and emergency pipeline).
+    def __init__(self, router, capacity=64, cell_deg=0.002, repair_seconds=120.0):
+        self.router = router
+        self.capacity = capacity
+        self.cell_deg = cell_deg
+        self.repair_seconds = repair_seconds
+        self._entries = OrderedDict()
+        self._active = OrderedDict()   # destination node -> most recent route there
+        self.stats = {'hits': 0, 'on_path': 0, 'repairs': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def _store(self, key, entry):
+        target = key[1]
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        self._active[target] = entry
+        self._active.move_to_end(target)
+        while len(self._active) > self.capacity:
+            self._active.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._active.clear()
+
+    def route(self, origin, destination):
+        # origin/destination are (lat, lon); returns a Route or None
+        with self._lock:
+            return self._route(origin, destination)
+
+    def _route(self, origin, destination):
+        graph = self.router.graph
+        source = graph.nearest_node(*origin)
+        target = graph.nearest_node(*destination)
+        key = (self._cell(*origin), target)
+
+        entry = self._entries.get(key)
+        if entry is not None and source in entry.position:
+            self.stats['hits'] += 1
+            self._entries.move_to_end(key)
+            return entry.suffix(entry.position[source])
+
+        active = self._active.get(target)
+        if active is not None:
+            i = active.position.get(source)
+            if i is not None:
+                # Still on the path: drop the part already driven
+                self.stats['on_path'] += 1
+                self._store(key, active)
+                return active.suffix(i)
+
+            # Slightly off the path: repair only the prefix back onto it
+            found = self.router.shortest_path_to_any(source, active.remaining(), self.repair_seconds)
+            if found is not None:
+                prefix, _ = found
+                join = active.position[prefix[-1]]
+                entry = CachedRoute(prefix + active.nodes[join + 1:],
+                                    self.router.edge_costs(prefix) + active.costs[join:], graph)
+                self.stats['repairs'] += 1
+                self._store(key, entry)
+                return entry.suffix(0)
+
+        self.stats['misses'] += 1
+        found = self.router.shortest_path(source, target)
+        if found is None:
+            return None
+        nodes, _ = found
+        entry = CachedRoute(nodes, self.router.edge_costs(nodes), graph)
+        self._store(key, entry)
+        return entry.suffix(0)
@@ -0,0 +1,275 @@
+import csv
+import heapq
+import random
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from geo_index import GridIndex, haversine_m
+
+# nodes: graph node ids in travel order, points: (lat, lon) per node
+Route = namedtuple('Route', 'nodes seconds meters points')
+
+
+class RoadGraph:
+    # Directed road network in CSR form: the out-edges of node v are
+    # indices[indptr[v]:indptr[v + 1]] with matching travel times and lengths.
+    def __init__(self, indptr, indices, seconds, meters, lats, lons):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.seconds = np.asarray(seconds, dtype=np.float32)
+        self.meters = np.asarray(meters, dtype=np.float32)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self._index = None
+
+    def __len__(self):
+        return len(self.lats)
+
+    @classmethod
+    def from_edges(cls, sources, targets, seconds, meters, lats, lons):
+        sources = np.asarray(sources, dtype=np.int64)
+        order = np.argsort(sources, kind='stable')
+        indptr = np.zeros(len(lats) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(lats)), out=indptr[1:])
+        return cls(indptr, np.asarray(targets)[order], np.asarray(seconds)[order],
+                   np.asarray(meters)[order], lats, lons)
+
+    @classmethod
+    def from_csv(cls, nodes_path, edges_path):
+        # nodes: id,lat,lon   edges: source,target,length_m,speed_kph[,oneway]
+        # (the usual shape of an OSM extract exported with osmium/osmnx)
+        ids, lats, lons = {}, [], []
+        with open(nodes_path, newline='') as f:
+            for row in csv.DictReader(f):
+                ids[row['id']] = len(lats)
+                lats.append(float(row['lat']))
+                lons.append(float(row['lon']))
+
+        sources, targets, seconds, meters = [], [], [], []
+        with open(edges_path, newline='') as f:
+            for row in csv.DictReader(f):
+                u, v = ids[row['source']], ids[row['target']]
+                length = float(row['length_m'])
+                travel = length / (float(row['speed_kph']) / 3.6)
+                sources.append(u); targets.append(v); seconds.append(travel); meters.append(length)
+                if row.get('oneway', '0') not in ('1', 'yes', 'true'):
+                    sources.append(v); targets.append(u); seconds.append(travel); meters.append(length)
+        return cls.from_edges(sources, targets, seconds, meters, lats, lons)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        graph = cls(data['indptr'], data['indices'], data['seconds'], data['meters'],
+                    data['lats'], data['lons'])
+        if 'landmarks' in data:
+            graph.landmarks = (data['landmarks'], data['landmarks_from'], data['landmarks_to'])
+        return graph
+
+    def save(self, path, landmarks=None):
+        arrays = dict(indptr=self.indptr, indices=self.indices, seconds=self.seconds,
+                      meters=self.meters, lats=self.lats, lons=self.lons)
+        if landmarks is not None:
+            arrays.update(landmarks=landmarks[0], landmarks_from=landmarks[1],
+                          landmarks_to=landmarks[2])
+        np.savez(path, **arrays)
+
+    def reversed(self):
+        sources = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+        return RoadGraph.from_edges(self.indices, sources, self.seconds, self.meters,
+                                    self.lats, self.lons)
+
+    def nearest_node(self, lat, lon):
+        if self._index is None:
+            self._index = GridIndex(self.lats, self.lons)
+        idx, _ = self._index.nearest(lat, lon)
+        return int(idx[0])
+
+    def dijkstra(self, source):
+        # Travel time from source to every node (inf where unreachable)
+        indptr, indices, seconds = self.indptr.tolist(), self.indices.tolist(), self.seconds.tolist()
+        dist = [float('inf')] * len(self)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for e in range(indptr[u], indptr[u + 1]):
+                nd = d + seconds[e]
+                v = indices[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return np.array(dist, dtype=np.float32)
+
+
+def select_landmarks(graph, count=8, seed=0):
+    # Farthest-point landmark selection; returns (landmarks, from_L, to_L) where
+    # from_L[i, v] = d(L_i, v) and to_L[i, v] = d(v, L_i)
+    reverse = graph.reversed()
+    landmarks, dist_from, dist_to = [], [], []
+    current = random.Random(seed).randrange(len(graph))
+    coverage = np.full(len(graph), np.inf, dtype=np.float32)
+    for _ in range(count):
+        forward = graph.dijkstra(current)
+        backward = reverse.dijkstra(current)
+        landmarks.append(current)
+        dist_from.append(forward)
+        dist_to.append(backward)
+        # Next landmark: the node farthest from every landmark picked so far
+        coverage = np.minimum(coverage, np.where(np.isfinite(forward), forward, 0))
+        coverage[landmarks] = 0
+        current = int(np.argmax(coverage))
+    return np.array(landmarks, dtype=np.int32), np.vstack(dist_from), np.vstack(dist_to)
+
+
+class Router:
+    # A* over the CSR graph with ALT (landmark triangle-inequality) lower bounds
+    def __init__(self, graph, active_landmarks=4):
+        self.graph = graph
+        self.active_landmarks = active_landmarks
+        # Plain lists are far faster than numpy scalars in the search loop
+        self._indptr = graph.indptr.tolist()
+        self._indices = graph.indices.tolist()
+        self._seconds = graph.seconds.tolist()
+        landmarks = getattr(graph, 'landmarks', None)
+        self._from = landmarks[1] if landmarks is not None else None
+        self._to = landmarks[2] if landmarks is not None else None
+        # Fallback bound: straight-line distance at the network's top speed
+        speeds = graph.meters / np.maximum(graph.seconds, 1e-3)
+        self._max_speed = float(speeds.max()) if len(speeds) else 1.0
+
+    @classmethod
+    def load(cls, path):
+        return cls(RoadGraph.load(path))
+
+    def _heuristic(self, source, target):
+        if self._from is None:
+            lats, lons = self.graph.lats, self.graph.lons
+            bound = (haversine_m(lats[target], lons[target], lats, lons) / self._max_speed).tolist()
+            return bound.__getitem__
+
+        # Keep only the landmarks that give the tightest bound at the source
+        from_t = self._from[:, target]
+        to_t = self._to[:, target]
+        with np.errstate(invalid='ignore'):
+            at_source = np.fmax(from_t - self._from[:, source], self._to[:, source] - to_t)
+        rank = np.argsort(-np.nan_to_num(at_source, nan=-1.0))[:self.active_landmarks]
+        rows = [(self._from[i], float(from_t[i]), self._to[i], float(to_t[i])) for i in rank]
+
+        def h(v):
+            best = 0.0
+            for dist_from, ft, dist_to, tt in rows:
+                a = ft - dist_from[v]
+                b = dist_to[v] - tt
+                if a > best:
+                    best = a
+                if b > best:
+                    best = b
+            return best
+        return h
+
+    def shortest_path(self, source, target):
+        # Returns (node list, travel seconds) or None when target is unreachable
+        indptr, indices, seconds = self._indptr, self._indices, self._seconds
+        h = self._heuristic(source, target)
+        g = {source: 0.0}
+        parent = {source: -1}
+        closed = set()
+        heap = [(h(source), 0.0, source)]
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            if u == target:
+                path = []
+                while u != -1:
+                    path.append(u)
+                    u = parent[u]
+                return path[::-1], d
+            closed.add(u)
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + seconds[e]
+                if nd < g.get(v, float('inf')):
+                    g[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd + h(v), nd, v))
+        return None
+
+    def shortest_path_to_any(self, source, remaining, max_seconds=float('inf')):
+        # Bounded Dijkstra towards a set of join nodes, where remaining[v] is the
+        # travel time still needed from v. Returns (nodes up to the join node,
+        # seconds to reach it) minimising the total, or None within max_seconds.
+        indptr, indices, seconds = self._indptr, self._indices, self._seconds
+        dist = {source: 0.0}
+        parent = {source: -1}
+        heap = [(0.0, source)]
+        best, best_node = float('inf'), None
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if d >= best or d > max_seconds:
+                break
+            if u in remaining and d + remaining[u] < best:
+                best, best_node = d + remaining[u], u
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + seconds[e]
+                if nd < dist.get(v, float('inf')):
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+        if best_node is None:
+            return None
+        path, u = [], best_node
+        while u != -1:
+            path.append(u)
+            u = parent[u]
+        return path[::-1], dist[best_node]
+
+    def route(self, origin, destination):
+        # origin/destination are (lat, lon); returns a Route or None
+        graph = self.graph
+        source = graph.nearest_node(*origin)
+        target = graph.nearest_node(*destination)
+        found = self.shortest_path(source, target)
+        if found is None:
+            return None
+        nodes, seconds = found
+        return self.make_route(nodes, seconds)
+
+    def edge_costs(self, nodes):
+        # (seconds, meters) of the fastest edge between each consecutive node pair
+        indptr, indices, seconds = self._indptr, self._indices, self._seconds
+        costs = []
+        for u, v in zip(nodes, nodes[1:]):
+            edge = min((e for e in range(indptr[u], indptr[u + 1]) if indices[e] == v),
+                       key=seconds.__getitem__)
+            costs.append((seconds[edge], float(self.graph.meters[edge])))
+        return costs
+
+    def make_route(self, nodes, seconds):
+        graph = self.graph
+        meters = sum(m for _, m in self.edge_costs(nodes))
+        points = list(zip(graph.lats[nodes].tolist(), graph.lons[nodes].tolist()))
+        return Route(nodes, seconds, meters, points)
+
+
+def build(nodes_csv, edges_csv, output, landmarks=8):
+    graph = RoadGraph.from_csv(nodes_csv, edges_csv)
+    graph.save(output, select_landmarks(graph, landmarks) if landmarks else None)
+    return graph
+
+
+if __name__ == "__main__":
+    # python routing.py nodes.csv edges.csv data/road_graph.npz [landmarks]
+    if len(sys.argv) < 4:
+        print("usage: routing.py NODES_CSV EDGES_CSV OUTPUT_NPZ [LANDMARKS]")
+        sys.exit(1)
+    graph = build(sys.argv[1], sys.argv[2], sys.argv[3],
+                  int(sys.argv[4]) if len(sys.argv) > 4 else 8)
+    print(f"Wrote {sys.argv[3]}: {len(graph)} nodes, {len(graph.indices)} edges")
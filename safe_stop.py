@@ -0,0 +1,97 @@
+import csv
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from geo_index import EARTH_RADIUS_M, GridIndex, haversine_m
+
+SafeStop = namedtuple('SafeStop', 'name kind lat lon distance_m')
+
+
+def bearing(lat1, lon1, lat2, lon2):
+    # Initial bearing (deg) from point(s) 1 to point(s) 2
+    lat1, lat2 = np.radians(lat1), np.radians(lat2)
+    dlon = np.radians(np.asarray(lon2) - lon1)
+    y = np.sin(dlon) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return np.degrees(np.arctan2(y, x)) % 360
+
+
+def segment_lengths(lats, lons):
+    lat1, lat2 = np.radians(lats[:-1]), np.radians(lats[1:])
+    dlon = np.radians(np.diff(lons))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def heading_diff(a, b):
+    return np.abs((np.asarray(a) - b + 180) % 360 - 180)
+
+
+class SafeStopIndex:
+    # Shoulders, pull-offs and parking areas, attached to the road node they sit
+    # on so a route can be scanned in driving order without any geometry search.
+    def __init__(self, names, kinds, lats, lons, headings, graph=None, max_heading_diff=60):
+        self.names = list(names)
+        self.kinds = list(kinds)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        # Direction of travel the stop is reachable from; NaN means either direction
+        self.headings = np.asarray(headings, dtype=np.float64)
+        self.max_heading_diff = max_heading_diff
+        self.grid = GridIndex(self.lats, self.lons)
+        self.node_stops = {}
+        if graph is not None:
+            for i, (lat, lon) in enumerate(zip(self.lats, self.lons)):
+                self.node_stops.setdefault(graph.nearest_node(lat, lon), []).append(i)
+
+    def __len__(self):
+        return len(self.lats)
+
+    @classmethod
+    def from_csv(cls, path, graph=None):
+        # name,kind,lat,lon[,heading]
+        names, kinds, lats, lons, headings = [], [], [], [], []
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                names.append(row['name'])
+                kinds.append(row['kind'])
+                lats.append(float(row['lat']))
+                lons.append(float(row['lon']))
+                headings.append(float(row['heading']) if row.get('heading') else float('nan'))
+        return cls(names, kinds, lats, lons, headings, graph)
+
+    def _accepts(self, i, travel_heading):
+        heading = self.headings[i]
+        return math.isnan(heading) or heading_diff(heading, travel_heading) <= self.max_heading_diff
+
+    def ahead_on_route(self, route, min_distance_m=50, max_distance_m=5000):
+        # First stop along the route whose approach matches the travel direction
+        if not self.node_stops or len(route.points) < 2:
+            return None
+        lats, lons = np.array(route.points).T
+        along = np.concatenate([[0.0], np.cumsum(segment_lengths(lats, lons))]).tolist()
+        travel = bearing(lats[:-1], lons[:-1], lats[1:], lons[1:]).tolist()
+        for k, node in enumerate(route.nodes):
+            if along[k] > max_distance_m:
+                break
+            stops = self.node_stops.get(node)
+            if not stops:
+                continue
+            heading = travel[min(k, len(travel) - 1)]
+            for i in stops:
+                distance = along[k] + haversine_m(lats[k], lons[k], self.lats[i:i + 1], self.lons[i:i + 1])[0]
+                if distance >= min_distance_m and self._accepts(i, heading):
+                    return SafeStop(self.names[i], self.kinds[i], float(self.lats[i]), float(self.lons[i]),
+                                    float(distance))
+        return None
+
+    def nearest_ahead(self, lat, lon, heading, min_distance_m=50, max_distance_m=2000, k=16):
+        # Without a route: closest stops inside a cone around the current heading
+        idx, dist = self.grid.nearest(lat, lon, k, max_distance_m)
+        in_cone = heading_diff(bearing(lat, lon, self.lats[idx], self.lons[idx]), heading)
+        for i, d, off_axis in zip(idx, dist, in_cone):
+            if d >= min_distance_m and off_axis <= self.max_heading_diff and self._accepts(i, heading):
+                return SafeStop(self.names[i], self.kinds[i], float(self.lats[i]), float(self.lons[i]), float(d))
+        return None
@@ -0,0 +1,173 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+
+class SeatRoi:
+    # Learns where the driver's head sits from the first minutes of driving and
+    # then restricts the face search to that crop. Every `full_every` frames the
+    # whole frame is still scanned; if those checks keep finding the face outside
+    # the crop (seat moved, camera bumped, different driver), the ROI is dropped
+    # and learned again. The learned ROI is kept in a small JSON file per frame size.
+    def __init__(self, path, learn_seconds=120.0, min_samples=60, margin=0.5, misses_to_relearn=3):
+        self.path = path
+        self.learn_seconds = learn_seconds
+        self.min_samples = min_samples
+        self.margin = margin
+        self.misses_to_relearn = misses_to_relearn
+        self.roi = None          # (x, y, w, h) in full-frame pixels
+        self.frame_size = None   # (width, height) the ROI belongs to
+        self._boxes = []
+        self.samples = 0
+        self._learn_started = None
+        self._frame = 0
+        self._misses = 0
+        self.pixels_scanned = 0
+        self.pixels_full = 0
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.roi = tuple(data['roi'])
+            self.frame_size = tuple(data['frame_size'])
+        except (OSError, ValueError, KeyError, TypeError):
+            self.roi = self.frame_size = None
+        return self.roi
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'roi': self.roi, 'frame_size': self.frame_size, 'samples': self.samples,
+                       'learned_at': time.strftime('%Y-%m-%dT%H:%M:%S')}, f)
+        os.replace(tmp, self.path)
+
+    def region(self, frame_size, full_every=30):
+        # Crop to search this frame, or None for a full-frame pass
+        self._frame += 1
+        if self.roi is None or frame_size != self.frame_size or self._frame % full_every == 0:
+            return None
+        return self.roi
+
+    @property
+    def reduction(self):
+        # How many times fewer pixels the face cascade has scanned so far
+        return self.pixels_full / self.pixels_scanned if self.pixels_scanned else 1.0
+
+    def observe(self, faces, frame_size, region, now=None, missed=None):
+        # Feed back the faces found with the region that was searched; missed is a
+        # crop searched first without finding a face (then region is None). Returns
+        # a message when the ROI is learned or dropped, otherwise None.
+        width, height = frame_size
+        self.pixels_full += width * height
+        self.pixels_scanned += region[2] * region[3] if region else width * height
+        if missed:
+            self.pixels_scanned += missed[2] * missed[3]
+        if region is not None:
+            return None
+        now = time.monotonic() if now is None else now
+        # The driver is the largest face; passengers are ignored
+        driver = max(faces, key=lambda f: f[2] * f[3]) if len(faces) else None
+
+        if self.roi is not None and frame_size == self.frame_size:
+            if driver is None:
+                return None
+            x, y, w, h = driver
+            rx, ry, rw, rh = self.roi
+            if rx <= x + w / 2 <= rx + rw and ry <= y + h / 2 <= ry + rh:
+                self._misses = 0
+                return None
+            self._misses += 1
+            if self._misses < self.misses_to_relearn:
+                return None
+            self.roi = self.frame_size = None
+            self._boxes, self._learn_started, self._misses = [], None, 0
+            return "Seat ROI dropped: driver found outside it, relearning"
+
+        if self._learn_started is None:
+            self._learn_started = now
+        if driver is not None:
+            self._boxes.append(tuple(driver))
+        if now - self._learn_started < self.learn_seconds or len(self._boxes) < self.min_samples:
+            return None
+        self.roi = self.fit(self._boxes, frame_size, self.margin)
+        self.frame_size = tuple(frame_size)
+        self.samples, self._boxes = len(self._boxes), []
+        try:
+            self.save()
+        except OSError:
+            pass
+        rw, rh = self.roi[2], self.roi[3]
+        return (f"Seat ROI learned from {self.samples} detections: {rw}x{rh} of {width}x{height} "
+                f"({width * height / (rw * rh):.1f}x fewer pixels per frame)")
+
+    @staticmethod
+    def fit(boxes, frame_size, margin=0.5):
+        # 2nd-98th percentile of the box edges, padded by `margin` face sizes
+        boxes = np.asarray(boxes, dtype=np.float32)
+        x1, y1 = np.percentile(boxes[:, 0], 2), np.percentile(boxes[:, 1], 2)
+        x2 = np.percentile(boxes[:, 0] + boxes[:, 2], 98)
+        y2 = np.percentile(boxes[:, 1] + boxes[:, 3], 98)
+        pad_x, pad_y = margin * np.median(boxes[:, 2]), margin * np.median(boxes[:, 3])
+        width, height = frame_size
+        left, top = max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y))
+        right, bottom = min(width, int(x2 + pad_x)), min(height, int(y2 + pad_y))
+        return left, top, right - left, bottom - top
+
+
+if __name__ == "__main__":
+    # python seat_roi.py VIDEO [LEARN_SECONDS]: learn the ROI from a recording (full-frame
+    # passes while learning), then compare face hits and pixels scanned on the rest of it
+    import tempfile
+
+    import cv2
+
+    from cascade_warmup import FACE_MODEL, load_cascade
+    from perf_config import DEFAULTS as perf
+
+    video = sys.argv[1]
+    learn = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    cascade = load_cascade(FACE_MODEL)
+    roi = SeatRoi(os.path.join(tempfile.mkdtemp(), 'seat_roi.json'), learn_seconds=learn, min_samples=10)
+    cap = cv2.VideoCapture(video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 15
+
+    def detect(gray, region):
+        x0, y0, w0, h0 = region or (0, 0, gray.shape[1], gray.shape[0])
+        fx, fy = perf.detect_width / gray.shape[1], perf.detect_height / gray.shape[0]
+        small = cv2.resize(gray[y0:y0 + h0, x0:x0 + w0], (max(1, int(w0 * fx)), max(1, int(h0 * fy))))
+        faces = cascade.detectMultiScale(small, perf.scale_factor, perf.min_neighbors,
+                                         minSize=(perf.min_face, perf.min_face))
+        return [(x0 + int(x / fx), y0 + int(y / fy), int(w / fx), int(h / fy)) for x, y, w, h in faces]
+
+    index, found = 0, {'full': 0, 'roi': 0}
+    busy = {'full': 0.0, 'roi': 0.0}
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        size = (gray.shape[1], gray.shape[0])
+        if roi.roi is None:
+            message = roi.observe(detect(gray, None), size, None, now=index / fps)
+            if message:
+                print(f"{index / fps:6.1f} s  {message}")
+                roi.pixels_scanned = roi.pixels_full = 0
+        else:
+            # After learning: the full-frame answer is the reference for the crop
+            for mode, region in (('full', None), ('roi', roi.region(size, full_every=10 ** 9))):
+                start = time.perf_counter()
+                faces = detect(gray, region)
+                busy[mode] += time.perf_counter() - start
+                found[mode] += len(faces) > 0
+            roi.observe(faces, size, region)
+        index += 1
+    if roi.roi is None:
+        print("not enough face detections to learn a seat ROI")
+        sys.exit(1)
+    print(f"after learning: face found in {found['roi']} frames with the ROI vs {found['full']} full-frame; "
+          f"{roi.reduction:.1f}x fewer pixels, detection {busy['full'] * 1000:.0f} -> {busy['roi'] * 1000:.0f} ms")
@@ -0,0 +1,251 @@
+import csv
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+import cv2
+
+from latency_trace import ReplayCapture
+
+# Growth per 12 h (after warm-up) that counts as a leak when the trend is also monotonic
+TOLERANCE_12H = {
+    'rss_mb': 32.0,
+    'traced_mb': 16.0,
+    'objects': 20000,
+    'threads': 2,
+    'log_lines': 2000,
+}
+# Shorter post-warm-up spans are too noisy to extrapolate to a shift
+MIN_SPAN_S = 3600
+
+
+class LoopingCapture(ReplayCapture):
+    # Replays the video over and over so a short clip can feed an hours-long run
+    def read(self):
+        ret, frame = self._cap.read()
+        if not ret:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read()
+        if ret:
+            self.frames += 1
+        return ret, frame
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+
+def rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class SoakMonitor:
+    # Samples resource use of the running app on its own event loop: RSS, traced
+    # Python heap, live object count (and the types behind it), threads, log
+    # widget size and FPS. tracemalloc keeps one frame per allocation so the
+    # overhead stays small enough for hours-long runs.
+    def __init__(self, app, capture, interval=60.0, warmup=600.0, csv_path=None):
+        self.app = app
+        self.capture = capture
+        self.interval = interval
+        self.warmup = warmup
+        self.csv_path = csv_path
+        self.samples = []
+        self._baseline = None
+        self._types = None
+        self._last = None
+        self._started = None
+
+    def start(self):
+        tracemalloc.start(1)
+        self._started = time.monotonic()
+        self._last = (self._started, self.capture.frames)
+        self.app.root.after(int(self.interval * 1000), self.sample)
+        return self
+
+    def log_lines(self):
+        lines = 0
+        for widget in (self.app.actions_text, self.app.comm_text):
+            if widget is not None:
+                lines += int(widget.index('end-1c').split('.')[0])
+        return lines + len(self.app._pending_actions) + len(self.app._pending_comms)
+
+    def sample(self):
+        now, frames = time.monotonic(), self.capture.frames
+        gc.collect()
+        objects = gc.get_objects()
+        sample = {
+            'elapsed_s': round(now - self._started, 1),
+            'rss_mb': rss_mb(),
+            'traced_mb': tracemalloc.get_traced_memory()[0] / 2 ** 20,
+            'objects': len(objects),
+            'threads': threading.active_count(),
+            'log_lines': self.log_lines(),
+            'fps': (frames - self._last[1]) / (now - self._last[0]),
+        }
+        types = Counter(type(o).__name__ for o in objects)
+        del objects
+        if self._baseline is None and sample['elapsed_s'] >= self.warmup:
+            # Reference point for "what grew": once lazy imports are done and bounded buffers are full
+            self._baseline = tracemalloc.take_snapshot()
+            self._types = types
+        self.samples.append(sample)
+        self._last = (now, frames)
+        if self.csv_path:
+            new = not os.path.exists(self.csv_path)
+            with open(self.csv_path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(sample))
+                if new:
+                    writer.writeheader()
+                writer.writerow(sample)
+        print(f"[{sample['elapsed_s'] / 3600:5.2f} h] RSS {sample['rss_mb'] or 0:.1f} MB, "
+              f"heap {sample['traced_mb']:.1f} MB, {sample['objects']} objects, {sample['threads']} threads, "
+              f"{sample['log_lines']} log lines, {sample['fps']:.1f} FPS", flush=True)
+        self.app.root.after(int(self.interval * 1000), self.sample)
+
+    def top_allocators(self, limit=10):
+        # Source lines whose live allocations grew most since the baseline
+        if self._baseline is None:
+            return []
+        stats = tracemalloc.take_snapshot().compare_to(self._baseline, 'lineno')
+        return [(str(s.traceback[0]), s.size_diff, s.count_diff) for s in stats[:limit] if s.size_diff > 0]
+
+    def type_growth(self, limit=10):
+        if self._types is None:
+            return []
+        gc.collect()
+        now = Counter(type(o).__name__ for o in gc.get_objects())
+        now.subtract(self._types)
+        return [(name, count) for name, count in now.most_common(limit) if count > 0]
+
+    def findings(self):
+        # (metric, first, last, per-hour slope, flagged) for every sampled metric;
+        # flagged is None when the run was too short to judge
+        return [trend(self.samples, key, self.warmup) for key in list(TOLERANCE_12H) + ['fps']]
+
+
+def slope_per_hour(points):
+    n = len(points)
+    mean_t = sum(t for t, _ in points) / n
+    mean_v = sum(v for _, v in points) / n
+    var_t = sum((t - mean_t) ** 2 for t, _ in points) or 1.0
+    return sum((t - mean_t) * (v - mean_v) for t, v in points) / var_t * 3600
+
+
+def trend(samples, key, warmup=600.0):
+    # Least-squares slope after the warm-up. A leak has to keep growing: both
+    # halves of the run must trend up past the tolerance, so a bounded buffer
+    # that fills up and then plateaus is not flagged.
+    points = [(s['elapsed_s'], s[key]) for s in samples if s['elapsed_s'] >= warmup and s[key] is not None]
+    if len(points) < 8:
+        return key, None, None, None, False
+    if points[-1][0] - points[0][0] < MIN_SPAN_S:
+        return key, points[0][1], points[-1][1], slope_per_hour(points), None
+    half = len(points) // 2
+    slopes = [slope_per_hour(points), slope_per_hour(points[:half]), slope_per_hour(points[half:])]
+    if key == 'fps':
+        # FPS is flagged for a sustained decline of more than 10%
+        flagged = all(slope * 12 < -0.1 * points[0][1] for slope in slopes)
+    else:
+        flagged = all(slope * 12 > TOLERANCE_12H[key] for slope in slopes)
+    return key, points[0][1], points[-1][1], slopes[0], flagged
+
+
+def format_report(monitor):
+    lines = [f"{'metric':10s} {'start':>10s} {'end':>10s} {'per hour':>10s} {'12 h proj':>10s}  verdict"]
+    for key, first, last, slope, flagged in monitor.findings():
+        if slope is None:
+            lines.append(f"{key:10s} {'':>10s} {'':>10s} {'':>10s} {'':>10s}  too few samples")
+            continue
+        verdict = 'run too short' if flagged is None else 'GROWING' if flagged else 'ok'
+        lines.append(f"{key:10s} {first:10.1f} {last:10.1f} {slope:+10.2f} {slope * 12:+10.1f}  {verdict}")
+    allocators = monitor.top_allocators()
+    if allocators:
+        lines.append("top growing allocation sites:")
+        lines += [f"  {size / 1024:+9.1f} KiB {count:+7d} blocks  {site}" for site, size, count in allocators]
+    types = monitor.type_growth()
+    if types:
+        lines.append("object types that grew: " + ', '.join(f"{name} +{count}" for name, count in types))
+    return '\n'.join(lines)
+
+
+def run(video, hours=12.0, interval=60.0, gui=False, event_every=300.0, reset_after=20.0, csv_path=None,
+        warmup=None):
+    # Drives the real app on a looping replay for `hours`, with a simulated
+    # cardiac event every `event_every` seconds so the emergency path, logs and
+    # map are exercised too. Trends ignore the first `warmup` seconds (default
+    # 10% of the run, at most 10 minutes). Returns the monitor; .findings() says what grew.
+    from driver_monitoring import DriverMonitoringSystem
+
+    if gui:
+        import tkinter as tk
+        root = tk.Tk()
+    else:
+        from headless import HeadlessLoop
+        root = HeadlessLoop()
+    # No checkpoint: simulated emergencies must not leak into the unit's real state
+    app = DriverMonitoringSystem(root, headless=not gui, checkpoint_path=None)
+    app.detector_ready.wait()
+    capture = app.cap = LoopingCapture(video)
+    app.monitoring_active = True
+    root.after(0, app.update_camera_feed)
+    if warmup is None:
+        warmup = min(600.0, hours * 360)
+    monitor = SoakMonitor(app, capture, interval, warmup, csv_path).start()
+
+    started = time.monotonic()
+    emergency_since = [None]
+
+    def drive():
+        # Clear every emergency after reset_after seconds, camera- or event-triggered
+        if app.emergency_detected:
+            if emergency_since[0] is None:
+                emergency_since[0] = time.monotonic()
+            elif time.monotonic() - emergency_since[0] > reset_after:
+                app.reset_to_normal()
+                emergency_since[0] = None
+        if time.monotonic() - started >= hours * 3600:
+            root.quit()
+        else:
+            root.after(1000, drive)
+
+    def cardiac_event():
+        app.simulate_heart_attack()
+        root.after(int(event_every * 1000), cardiac_event)
+
+    root.after(1000, drive)
+    if event_every:
+        root.after(int(event_every * 1000), cardiac_event)
+    try:
+        root.mainloop()
+    except KeyboardInterrupt:
+        pass
+    app.shutdown()
+    return monitor
+
+
+if __name__ == "__main__":
+    # python soak_test.py VIDEO [--hours=12] [--interval=60] [--events=300] [--warmup=600] [--csv=soak.csv] [--gui]
+    # (GUI soak without a display: xvfb-run python soak_test.py ... --gui)
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) if '=' in a else (a[2:], '1') for a in sys.argv[1:] if a.startswith('--'))
+    if not args:
+        print("usage: soak_test.py VIDEO [--hours=H] [--interval=S] [--events=S] [--warmup=S] [--csv=PATH] [--gui]")
+        sys.exit(2)
+    monitor = run(args[0], float(options.get('hours', 12)), float(options.get('interval', 60)),
+                  'gui' in options, float(options.get('events', 300)), csv_path=options.get('csv'),
+                  warmup=float(options['warmup']) if 'warmup' in options else None)
+    print(format_report(monitor))
+    sys.exit(1 if any(flagged for *_, flagged in monitor.findings()) else 0)
@@ -0,0 +1,271 @@
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+from routing import Route
+from vehicle_table import VEHICLE_DTYPE
+
+Checkpoint = namedtuple('Checkpoint', [
+    'saved_at',            # time.time() of the capture
+    'emergency',
+    'autonomous',
+    'heart_rate',
+    'fatigue',
+    'speed',
+    'lat', 'lon', 'heading',
+    'hospital_name',
+    'hospital_lat', 'hospital_lon',
+    'route_info',          # route summary text shown in the routing tab
+    'emergency_route',     # Route or None
+    'destination_route',   # Route or None
+    'vehicle_ids',         # one ID per VEHICLE_DTYPE record
+    'vehicles',
+    'vitals',              # float64 (n, 3): time, heart rate, fatigue
+])
+
+# File layout (little-endian): header, then the body the CRC covers.
+#   header   magic, version, flags (1 emergency, 2 autonomous), saved_at, body size, crc32
+#   body     scalars | hospital name | route info | 2 routes | vehicle IDs + records | vitals
+MAGIC = b'DMCK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHdII')
+SCALARS = struct.Struct('<8d')
+COUNTS = struct.Struct('<II')
+ROUTE = struct.Struct('<ddII')
+NAME = struct.Struct('<H')
+
+
+def _pack_name(name):
+    data = name.encode('utf-8')
+    return NAME.pack(len(data)) + data
+
+
+def _pack_route(route):
+    if route is None:
+        return ROUTE.pack(-1.0, 0.0, 0, 0)
+    nodes = np.asarray(route.nodes, dtype='<i4')
+    points = np.asarray(route.points, dtype='<f8').reshape(-1, 2)
+    return ROUTE.pack(route.seconds, route.meters, len(nodes), len(points)) + nodes.tobytes() + points.tobytes()
+
+
+def pack(cp):
+    vitals = np.asarray(cp.vitals, dtype='<f8').reshape(-1, 3)
+    vehicles = np.ascontiguousarray(cp.vehicles, dtype=VEHICLE_DTYPE)
+    body = b''.join([
+        SCALARS.pack(cp.heart_rate, cp.fatigue, cp.speed, cp.lat, cp.lon, cp.heading,
+                     cp.hospital_lat, cp.hospital_lon),
+        _pack_name(cp.hospital_name),
+        _pack_name(cp.route_info),
+        _pack_route(cp.emergency_route),
+        _pack_route(cp.destination_route),
+        COUNTS.pack(len(vehicles), len(vitals)),
+        b''.join(_pack_name(vehicle_id) for vehicle_id in cp.vehicle_ids),
+        vehicles.tobytes(),
+        vitals.tobytes(),
+    ])
+    flags = (1 if cp.emergency else 0) | (2 if cp.autonomous else 0)
+    return HEADER.pack(MAGIC, VERSION, flags, cp.saved_at, len(body), zlib.crc32(body)) + body
+
+
+class _Reader:
+    def __init__(self, data, offset):
+        self.data = memoryview(data)
+        self.offset = offset
+
+    def take(self, size):
+        if self.offset + size > len(self.data):
+            raise ValueError("checkpoint truncated")
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def unpack(self, layout):
+        return layout.unpack(self.take(layout.size))
+
+    def name(self):
+        size, = self.unpack(NAME)
+        return bytes(self.take(size)).decode('utf-8')
+
+    def array(self, dtype, count, shape=None):
+        array = np.frombuffer(self.take(np.dtype(dtype).itemsize * count), dtype=dtype).copy()
+        return array.reshape(shape) if shape else array
+
+    def route(self):
+        seconds, meters, node_count, point_count = self.unpack(ROUTE)
+        nodes = self.array('<i4', node_count)
+        points = self.array('<f8', point_count * 2, (-1, 2))
+        if seconds < 0:
+            return None
+        return Route(nodes.tolist(), seconds, meters, [tuple(p) for p in points.tolist()])
+
+
+def unpack(data):
+    # Raises ValueError for anything that is not a complete, intact checkpoint
+    if len(data) < HEADER.size:
+        raise ValueError("checkpoint truncated")
+    magic, version, flags, saved_at, size, crc = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a checkpoint of this version")
+    body = memoryview(data)[HEADER.size:]
+    if len(body) != size or zlib.crc32(body) != crc:
+        raise ValueError("checkpoint corrupt")
+    reader = _Reader(data, HEADER.size)
+    heart_rate, fatigue, speed, lat, lon, heading, hospital_lat, hospital_lon = reader.unpack(SCALARS)
+    hospital_name = reader.name()
+    route_info = reader.name()
+    emergency_route = reader.route()
+    destination_route = reader.route()
+    vehicle_count, vitals_count = reader.unpack(COUNTS)
+    vehicle_ids = [reader.name() for _ in range(vehicle_count)]
+    vehicles = reader.array(VEHICLE_DTYPE, vehicle_count)
+    vitals = reader.array('<f8', vitals_count * 3, (-1, 3))
+    return Checkpoint(saved_at, bool(flags & 1), bool(flags & 2), heart_rate, fatigue, speed, lat, lon, heading,
+                      hospital_name, hospital_lat, hospital_lon, route_info, emergency_route, destination_route,
+                      vehicle_ids, vehicles, vitals)
+
+
+def change_key(cp):
+    # The part of a checkpoint that must reach disk within one interval. Vitals,
+    # position and the vehicle table's per-tick columns (last_seen, distance,
+    # staleness) change every second and alone do not trigger a write.
+    routes = [None if route is None else route.nodes for route in (cp.emergency_route, cp.destination_route)]
+    return (cp.emergency, cp.autonomous, cp.hospital_name, cp.hospital_lat, cp.hospital_lon, cp.route_info,
+            routes, list(cp.vehicle_ids), np.asarray(cp.vehicles['alerted']).tobytes())
+
+
+def load_checkpoint(path, max_age=None):
+    # The checkpoint at path, or None if it is missing, unreadable or older than max_age seconds
+    try:
+        with open(path, 'rb') as f:
+            cp = unpack(f.read())
+    except (OSError, ValueError):
+        return None
+    if max_age is not None and time.time() - cp.saved_at > max_age:
+        return None
+    return cp
+
+
+def write_checkpoint(path, data):
+    # tmp + fsync + rename: a crash leaves either the old checkpoint or the new one
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Checkpointer:
+    # Background thread that calls capture() every `interval` seconds. A change in
+    # change_key() (emergency, routes, alerted vehicles) is written right away;
+    # otherwise the checkpoint is refreshed every `max_interval` seconds so vitals
+    # and position stay recent without an fsync every tick; request() writes at
+    # once, and stop() writes a final checkpoint. Capture, packing and the disk
+    # write all happen on this thread, never on the Tk/camera thread.
+    def __init__(self, path, capture, interval=1.0, max_interval=30.0, on_error=None):
+        self.path = path
+        self.capture = capture
+        self.interval = interval
+        self.max_interval = max_interval
+        self.on_error = on_error
+        self.writes = 0
+        self.last_write_ms = None
+        self._last_key = None
+        self._last_write = None
+        self._last_error = None
+        self._force = False
+        self._stopping = False
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def request(self):
+        # Safe from any thread: write on the next wake-up, changed or not
+        self._force = True
+        self._wake.set()
+
+    def save_now(self, force=False):
+        start = time.perf_counter()
+        cp = self.capture()
+        key = change_key(cp)
+        if (not force and key == self._last_key and self._last_write is not None
+                and time.monotonic() - self._last_write < self.max_interval):
+            return False
+        write_checkpoint(self.path, pack(cp))
+        self._last_key = key
+        self._last_write = time.monotonic()
+        self.writes += 1
+        self.last_write_ms = (time.perf_counter() - start) * 1000
+        return True
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            stopping = self._stopping
+            force, self._force = self._force or stopping, False
+            try:
+                self.save_now(force)
+                self._last_error = None
+            except Exception as e:
+                # Report a failure once, not every interval while it persists
+                if self.on_error is not None and str(e) != self._last_error:
+                    self.on_error(e)
+                self._last_error = str(e)
+            if stopping:
+                return
+
+
+if __name__ == "__main__":
+    # python state_checkpoint.py [VEHICLES] [ROUTE_POINTS]: size and speed of a mid-emergency checkpoint
+    import tempfile
+
+    vehicle_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    point_count = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    rng = np.random.default_rng(0)
+    vehicles = np.zeros(vehicle_count, dtype=VEHICLE_DTYPE)
+    vehicles['lat'] = 40.71 + rng.random(vehicle_count) * 0.01
+    vehicles['lon'] = -74.0 + rng.random(vehicle_count) * 0.01
+    vehicles['last_seen'] = time.time()
+    vehicles['alerted'] = True
+    route = Route(list(range(point_count)), 240.0, 2300.0,
+                  [(40.71 + i * 1e-4, -74.0 + i * 1e-4) for i in range(point_count)])
+    vitals = np.column_stack([time.time() - np.arange(120)[::-1], rng.integers(140, 180, 120),
+                              rng.integers(10, 30, 120)]).astype(np.float64)
+    cp = Checkpoint(time.time(), True, True, 160, 20, 25, 40.7128, -74.006, 90.0, "City General Hospital",
+                    40.7306, -73.9866, "Destination: City General Hospital", route, route, [f"VEH{i:03d}" for i in range(vehicle_count)], vehicles, vitals)
+
+    path = os.path.join(tempfile.mkdtemp(), 'state.ckpt')
+    rounds = 200
+    start = time.perf_counter()
+    for _ in range(rounds):
+        data = pack(cp)
+    pack_us = (time.perf_counter() - start) / rounds * 1e6
+    start = time.perf_counter()
+    for _ in range(rounds):
+        write_checkpoint(path, data)
+    write_ms = (time.perf_counter() - start) / rounds * 1000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        restored = load_checkpoint(path)
+    load_us = (time.perf_counter() - start) / rounds * 1e6
+    assert restored.emergency and restored.vehicle_ids == cp.vehicle_ids and restored.emergency_route == route
+    print(f"{len(data)} bytes ({vehicle_count} vehicles, {point_count}-point routes, {len(vitals)} vitals); "
+          f"pack {pack_us:.0f} us, atomic write+fsync {write_ms:.2f} ms, load+verify {load_us:.0f} us")
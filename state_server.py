@@ -0,0 +1,218 @@
+import base64
+import hashlib
+import json
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+_MISSING = object()
+
+
+def ws_frame(payload, opcode=0x1):
+    # Single unmasked server frame (text by default)
+    size = len(payload)
+    if size < 126:
+        header = struct.pack('!BB', 0x80 | opcode, size)
+    elif size < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, size)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, size)
+    return header + payload
+
+
+def encode(message):
+    return json.dumps(message, separators=(',', ':')).encode('utf-8')
+
+
+class StateHub:
+    # Flat, versioned key -> value state plus an event log. publish() diffs the
+    # new state against the last one and encodes the delta once; every
+    # subscriber is sent the same bytes, so a push costs one diff + one encode
+    # no matter how many clients are listening.
+    def __init__(self, history=64, max_events=256):
+        self.version = 0
+        self.state = {}
+        self.events = deque(maxlen=max_events)
+        self._event_seq = 0
+        self._new_events = []
+        self._deltas = deque(maxlen=history)   # (version, ws frame)
+        self._cond = threading.Condition()
+        self.subscribers = 0
+
+    def add_event(self, kind, text):
+        with self._cond:
+            self._event_seq += 1
+            event = {'seq': self._event_seq, 'kind': kind, 'text': text, 'time': round(time.time(), 3)}
+            self.events.append(event)
+            self._new_events.append(event)
+
+    def publish(self, state):
+        with self._cond:
+            changed = {key: value for key, value in state.items() if self.state.get(key, _MISSING) != value}
+            removed = [key for key in self.state if key not in state]
+            if not changed and not removed and not self._new_events:
+                return None
+            self.version += 1
+            delta = {'type': 'delta', 'version': self.version, 'set': changed}
+            if removed:
+                delta['del'] = removed
+            if self._new_events:
+                delta['events'] = self._new_events
+                self._new_events = []
+            self.state = dict(state)
+            self._deltas.append((self.version, ws_frame(encode(delta))))
+            self._cond.notify_all()
+            return delta
+
+    def snapshot(self):
+        with self._cond:
+            return {'type': 'snapshot', 'version': self.version, 'state': dict(self.state),
+                    'events': list(self.events)}
+
+    def events_since(self, seq):
+        with self._cond:
+            return [event for event in self.events if event['seq'] > seq]
+
+    def frames_since(self, version, timeout):
+        # (new version, frames) for a subscriber that has seen `version`; blocks up
+        # to timeout for news. A subscriber that fell out of history gets a snapshot.
+        with self._cond:
+            if self.version == version:
+                self._cond.wait(timeout)
+            if self.version == version:
+                return version, []
+            if not self._deltas or self._deltas[0][0] > version + 1:
+                return self.version, [ws_frame(encode(self.snapshot()))]
+            return self.version, [frame for v, frame in self._deltas if v > version]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    hub = None
+    ping_interval = 15.0
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, message, status=200):
+        body = encode(message)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/ws' and self.headers.get('Upgrade', '').lower() == 'websocket':
+            self._websocket()
+        elif url.path == '/state':
+            self._json(self.hub.snapshot())
+        elif url.path == '/events':
+            self._json(self.hub.events_since(int(query.get('since', ['0'])[0])))
+        else:
+            self._json({'error': 'not found', 'endpoints': ['/state', '/events?since=SEQ', '/ws']}, 404)
+
+    def _websocket(self):
+        key = self.headers.get('Sec-WebSocket-Key', '')
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode('ascii')).digest()).decode('ascii')
+        self.send_response(101, 'Switching Protocols')
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept)
+        self.end_headers()
+        self.close_connection = True
+
+        hub = self.hub
+        with hub._cond:
+            hub.subscribers += 1
+            snapshot = hub.snapshot()
+        try:
+            # Full state once, then only deltas; idle connections get pings so
+            # dead clients are noticed and their thread released
+            self.wfile.write(ws_frame(encode(snapshot)))
+            version = snapshot['version']
+            while True:
+                version, frames = hub.frames_since(version, self.ping_interval)
+                self.wfile.write(b''.join(frames) if frames else ws_frame(b'', opcode=0x9))
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            with hub._cond:
+                hub.subscribers -= 1
+
+
+class StateServer:
+    # GET /state (snapshot), GET /events?since=SEQ (polling), GET /ws (push).
+    # One lightweight thread per WebSocket subscriber, parked on the hub's
+    # condition between pushes.
+    def __init__(self, hub, host='127.0.0.1', port=8765):
+        handler = type('StateHandler', (_Handler,), {'hub': hub})
+        self.hub = hub
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.address = self.httpd.server_address
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    # python state_server.py [SUBSCRIBERS] [PUSHES]: fan-out benchmark on loopback
+    import socket
+
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    pushes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    hub = StateHub()
+    server = StateServer(hub, port=0).start()
+    host, port = server.address
+    received = [0] * subscribers
+
+    def subscribe(i):
+        sock = socket.create_connection((host, port))
+        sock.sendall(b"GET /ws HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n")
+        stream = sock.makefile('rb')
+        while stream.readline() not in (b'\r\n', b''):
+            pass
+        while True:
+            head = stream.read(2)
+            if len(head) < 2:
+                return
+            size = head[1] & 0x7f
+            if size == 126:
+                size, = struct.unpack('!H', stream.read(2))
+            elif size == 127:
+                size, = struct.unpack('!Q', stream.read(8))
+            message = json.loads(stream.read(size) or b'{}')
+            received[i] = message.get('version', received[i])
+
+    for i in range(subscribers):
+        threading.Thread(target=subscribe, args=(i,), daemon=True).start()
+    while hub.subscribers < subscribers:
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    for n in range(pushes):
+        hub.publish({'vitals.heart_rate': 70 + n % 5, 'status.emergency': n % 50 == 0, 'speed': n})
+        if n % 10 == 0:
+            hub.add_event('actions', f"event {n}")
+        time.sleep(0.005)
+    while min(received) < hub.version and time.perf_counter() - start < 10:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    print(f"{subscribers} subscribers, {pushes} pushes in {elapsed * 1000:.0f} ms; "
+          f"all caught up to version {min(received)}/{hub.version}; delta ~{len(hub._deltas[-1][1])} bytes")
@@ -0,0 +1,218 @@
+import io
+import math
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+TILE_SIZE = 256
+PACK_MAGIC = b'TPK1'
+INDEX_DTYPE = np.dtype([('key', '<u8'), ('offset', '<u8'), ('length', '<u4')])
+
+
+def tile_key(z, x, y):
+    return (z << 58) | (x << 29) | y
+
+
+def lonlat_to_tile(lat, lon, z):
+    # Fractional slippy-map (Web Mercator) tile coordinates
+    n = 2 ** z
+    lat = max(-85.0511, min(85.0511, lat))
+    x = (lon + 180) / 360 * n
+    y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+    return x, y
+
+
+def tile_to_lonlat(x, y, z):
+    n = 2 ** z
+    lon = x / n * 360 - 180
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    return lat, lon
+
+
+def build_pack(tiles_dir, pack_path):
+    # Pack a {z}/{x}/{y}.png tree into one file: header, sorted index, tile blobs
+    entries = []
+    for z in sorted(os.listdir(tiles_dir)):
+        if not z.isdigit():
+            continue
+        for x in os.listdir(os.path.join(tiles_dir, z)):
+            for name in os.listdir(os.path.join(tiles_dir, z, x)):
+                y = name.split('.')[0]
+                if x.isdigit() and y.isdigit():
+                    entries.append((tile_key(int(z), int(x), int(y)), os.path.join(tiles_dir, z, x, name)))
+    entries.sort()
+
+    index = np.zeros(len(entries), dtype=INDEX_DTYPE)
+    offset = len(PACK_MAGIC) + 4 + index.nbytes
+    with open(pack_path + '.tmp', 'wb') as out:
+        out.write(PACK_MAGIC + struct.pack('<I', len(entries)))
+        out.seek(offset)
+        for i, (key, path) in enumerate(entries):
+            with open(path, 'rb') as f:
+                blob = f.read()
+            index[i] = (key, offset, len(blob))
+            out.write(blob)
+            offset += len(blob)
+        out.seek(len(PACK_MAGIC) + 4)
+        out.write(index.tobytes())
+    os.replace(pack_path + '.tmp', pack_path)
+    return len(entries)
+
+
+class TilePack:
+    # Read-only, memory-mapped tile pack; lookups are a binary search on the index
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:4] != PACK_MAGIC:
+            raise ValueError(f"{path} is not a tile pack")
+        count, = struct.unpack_from('<I', self._map, 4)
+        self.index = np.frombuffer(self._map, dtype=INDEX_DTYPE, count=count, offset=8)
+        zooms = self.index['key'] >> np.uint64(58)
+        self.min_zoom = int(zooms.min()) if count else 0
+        self.max_zoom = int(zooms.max()) if count else 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, z, x, y):
+        key = tile_key(z, x, y)
+        i = int(np.searchsorted(self.index['key'], np.uint64(key)))
+        if i >= len(self.index) or int(self.index['key'][i]) != key:
+            return None
+        entry = self.index[i]
+        return self._map[int(entry['offset']):int(entry['offset']) + int(entry['length'])]
+
+    def close(self):
+        self.index = None
+        self._map.close()
+        self._file.close()
+
+
+class TileCache:
+    # Bounded LRU of decoded tiles in front of a TilePack, with a background
+    # prefetcher that warms the tiles along the active route
+    def __init__(self, pack, capacity=128):
+        self.pack = pack
+        self.capacity = capacity
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=1024)
+        self.stats = {'hits': 0, 'misses': 0, 'prefetched': 0}
+        threading.Thread(target=self._prefetch_worker, daemon=True).start()
+
+    def _decode(self, z, x, y):
+        blob = self.pack.get(z, x, y)
+        if blob is None:
+            return None
+        return np.asarray(Image.open(io.BytesIO(blob)).convert('RGB'))
+
+    def _insert(self, key, tile):
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.capacity:
+                self._tiles.popitem(last=False)
+
+    def get(self, z, x, y):
+        key = (z, x, y)
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                self.stats['hits'] += 1
+                return tile
+        self.stats['misses'] += 1
+        tile = self._decode(z, x, y)
+        if tile is not None:
+            self._insert(key, tile)
+        return tile
+
+    def prefetch(self, keys):
+        for key in keys:
+            try:
+                self._queue.put_nowait(key)
+            except queue.Full:
+                break
+
+    def _prefetch_worker(self):
+        while True:
+            key = self._queue.get()
+            with self._lock:
+                cached = key in self._tiles
+            if not cached:
+                tile = self._decode(*key)
+                if tile is not None:
+                    self._insert(key, tile)
+                    self.stats['prefetched'] += 1
+
+    def prefetch_route(self, points, z, margin=1):
+        # Tiles under and beside a route of (lat, lon) points, in driving order
+        wanted = OrderedDict()
+        for (lat1, lon1), (lat2, lon2) in zip(points, points[1:] or points):
+            x1, y1 = lonlat_to_tile(lat1, lon1, z)
+            x2, y2 = lonlat_to_tile(lat2, lon2, z)
+            steps = max(1, int(math.ceil(2 * max(abs(x2 - x1), abs(y2 - y1)))))
+            for i in range(steps + 1):
+                cx = int(x1 + (x2 - x1) * i / steps)
+                cy = int(y1 + (y2 - y1) * i / steps)
+                for dx in range(-margin, margin + 1):
+                    for dy in range(-margin, margin + 1):
+                        wanted[(z, cx + dx, cy + dy)] = None
+        self.prefetch(list(wanted)[:self.capacity])
+        return len(wanted)
+
+    def zoom_for(self, west, east, max_tiles=4):
+        width = max(east - west, 1e-6)
+        z = int(math.floor(math.log2(max_tiles * 360 / width)))
+        return max(self.pack.min_zoom, min(self.pack.max_zoom, z))
+
+    def render_area(self, south, west, north, east, z=None, max_tiles=36):
+        # Mosaic of cached tiles covering a box; returns (RGB array, extent) where
+        # extent is (west, east, south, north) of the mosaic in degrees. A box that
+        # needs more than max_tiles tiles even at the pack's coarsest zoom gets None,
+        # which keeps the mosaic (and the LRU churn behind it) bounded.
+        z = self.zoom_for(west, east) if z is None else z
+        x0, y0 = (int(v) for v in lonlat_to_tile(north, west, z))
+        x1, y1 = (int(v) for v in lonlat_to_tile(south, east, z))
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > max_tiles:
+            return None
+        image = np.full(((y1 - y0 + 1) * TILE_SIZE, (x1 - x0 + 1) * TILE_SIZE, 3), 26, dtype=np.uint8)
+        for ty in range(y0, y1 + 1):
+            for tx in range(x0, x1 + 1):
+                tile = self.get(z, tx, ty)
+                if tile is not None and tile.shape[:2] == (TILE_SIZE, TILE_SIZE):
+                    image[(ty - y0) * TILE_SIZE:(ty - y0 + 1) * TILE_SIZE,
+                          (tx - x0) * TILE_SIZE:(tx - x0 + 1) * TILE_SIZE] = tile
+        top, left = tile_to_lonlat(x0, y0, z)
+        bottom, right = tile_to_lonlat(x1 + 1, y1 + 1, z)
+        return image, (left, right, bottom, top)
+
+
+def render_folium_map(points, tiles_dir, html_path, zoom=14):
+    # Pre-rendered interactive map of a route over the local tile directory
+    import folium
+    lat, lon = points[0]
+    tiles = 'file://' + os.path.abspath(tiles_dir).replace(os.sep, '/') + '/{z}/{x}/{y}.png'
+    route_map = folium.Map(location=[lat, lon], zoom_start=zoom, tiles=tiles, attr='Offline tiles')
+    folium.PolyLine(points, color='red', weight=5).add_to(route_map)
+    folium.Marker(points[0], tooltip='Current Location').add_to(route_map)
+    folium.Marker(points[-1], tooltip='Destination').add_to(route_map)
+    route_map.save(html_path)
+    return html_path
+
+
+if __name__ == "__main__":
+    # python tile_cache.py TILES_DIR data/tiles.pack
+    if len(sys.argv) < 3:
+        print("usage: tile_cache.py TILES_DIR OUTPUT_PACK")
+        sys.exit(1)
+    count = build_pack(sys.argv[1], sys.argv[2])
+    print(f"Packed {count} tiles into {sys.argv[2]}")
@@ -0,0 +1,201 @@
+import heapq
+import itertools
+import random
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+# sender is the vehicle that transmitted this copy, origin the one that raised it
+Message = namedtuple('Message', 'message_id origin sender ttl hops payload created')
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = None
+
+    def allow(self, now, cost=1.0):
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+
+class DedupCache:
+    # Bounded LRU of message IDs -> number of copies heard
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self._seen = OrderedDict()
+
+    def __contains__(self, message_id):
+        return message_id in self._seen
+
+    def __len__(self):
+        return len(self._seen)
+
+    def record(self, message_id):
+        # Returns how many times the message had been heard before this copy
+        count = self._seen.pop(message_id, 0)
+        self._seen[message_id] = count + 1
+        if len(self._seen) > self.capacity:
+            self._seen.popitem(last=False)
+        return count
+
+    def count(self, message_id):
+        return self._seen.get(message_id, 0)
+
+
+class GossipRelay:
+    def __init__(self, node_id, send, on_deliver=None, ttl=4, dedup_size=4096,
+                 rate=5.0, burst=10, suppress_after=2, max_jitter=0.02,
+                 clock=time.monotonic, rng=None):
+        self.node_id = node_id
+        self.send = send                    # send(Message) puts a copy on the air
+        self.on_deliver = on_deliver        # on_deliver(Message) for first copies only
+        self.ttl = ttl
+        self.suppress_after = suppress_after
+        self.max_jitter = max_jitter
+        self.clock = clock
+        self.rng = rng or random.Random()
+
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._dedup = DedupCache(dedup_size)
+        self._pending = {}                  # message_id -> (due, Message)
+        self._seq = itertools.count(1)
+        self.stats = {'originated': 0, 'delivered': 0, 'duplicates': 0,
+                      'rate_limited': 0, 'relayed': 0, 'suppressed': 0, 'expired': 0}
+
+    def originate(self, payload, now=None):
+        now = self.clock() if now is None else now
+        message = Message(f"{self.node_id}:{next(self._seq)}", self.node_id, self.node_id,
+                          self.ttl, 0, payload, now)
+        self._dedup.record(message.message_id)
+        self.stats['originated'] += 1
+        self.send(message)
+        return message
+
+    def receive(self, message, now=None):
+        # Returns True when this is the first copy of the message seen here
+        now = self.clock() if now is None else now
+
+        bucket = self._buckets.get(message.sender)
+        if bucket is None:
+            bucket = self._buckets[message.sender] = TokenBucket(self.rate, self.burst)
+        if not bucket.allow(now):
+            self.stats['rate_limited'] += 1
+            return False
+
+        if self._dedup.record(message.message_id):
+            self.stats['duplicates'] += 1
+            return False
+
+        self.stats['delivered'] += 1
+        if self.on_deliver is not None:
+            self.on_deliver(message)
+
+        if message.ttl > 1:
+            # Wait a random backoff; if enough neighbours relay first, stay quiet
+            relay = message._replace(sender=self.node_id, ttl=message.ttl - 1, hops=message.hops + 1)
+            due = now + self.rng.uniform(0, self.max_jitter)
+            self._pending[message.message_id] = (due, relay)
+        else:
+            self.stats['expired'] += 1
+        return True
+
+    def next_due(self):
+        return min((due for due, _ in self._pending.values()), default=None)
+
+    def flush(self, now=None):
+        # Transmit or suppress every rebroadcast whose backoff has elapsed
+        now = self.clock() if now is None else now
+        sent = []
+        for message_id, (due, relay) in list(self._pending.items()):
+            if due > now:
+                continue
+            del self._pending[message_id]
+            if self._dedup.count(message_id) > self.suppress_after:
+                self.stats['suppressed'] += 1
+                continue
+            self.stats['relayed'] += 1
+            self.send(relay)
+            sent.append(relay)
+        return sent
+
+
+def simulate(n_vehicles, area_m=2000.0, radio_range_m=300.0, ttl=6, suppress_after=2,
+             link_delay=0.002, max_jitter=0.02, seed=0):
+    # Discrete-event run of one alert spreading from vehicle 0 across a random layout
+    rng = random.Random(seed)
+    positions = np.random.default_rng(seed).uniform(0, area_m, size=(n_vehicles, 2))
+    deltas = positions[:, None, :] - positions[None, :, :]
+    in_range = np.einsum('ijk,ijk->ij', deltas, deltas) <= radio_range_m ** 2
+    np.fill_diagonal(in_range, False)
+    neighbours = [np.flatnonzero(row) for row in in_range]
+
+    events = []
+    order = itertools.count()
+    state = {'now': 0.0, 'transmissions': 0}
+    first_delivery = {}
+
+    def make_sender(node):
+        def send(message):
+            state['transmissions'] += 1
+            for other in neighbours[node]:
+                arrival = state['now'] + link_delay * (1 + rng.random())
+                heapq.heappush(events, (arrival, next(order), 'rx', int(other), message))
+        return send
+
+    def make_deliver(node):
+        def deliver(message):
+            first_delivery.setdefault(node, state['now'] - message.created)
+        return deliver
+
+    nodes = [
+        GossipRelay(i, make_sender(i), make_deliver(i), ttl=ttl, suppress_after=suppress_after,
+                    max_jitter=max_jitter, clock=lambda: state['now'], rng=rng)
+        for i in range(n_vehicles)
+    ]
+
+    nodes[0].originate({'type': 'emergency'})
+    while events:
+        state['now'], _, kind, node, message = heapq.heappop(events)
+        relay = nodes[node]
+        if kind == 'rx':
+            if not relay.receive(message):
+                continue
+        else:
+            relay.flush()
+        due = relay.next_due()
+        if due is not None:
+            heapq.heappush(events, (due, next(order), 'tx', node, None))
+
+    latencies = np.array(sorted(first_delivery.values())) * 1000 if first_delivery else np.zeros(1)
+    suppressed = sum(n.stats['suppressed'] for n in nodes)
+    return {
+        'vehicles': n_vehicles,
+        'reached': len(first_delivery) / max(1, n_vehicles - 1),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'max_ms': float(latencies.max()),
+        'transmissions': state['transmissions'],
+        'per_vehicle': state['transmissions'] / n_vehicles,
+        'suppressed': suppressed,
+    }
+
+
+if __name__ == "__main__":
+    print(f"{'mode':<10}{'vehicles':>9}{'reached':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'max ms':>9}{'tx':>7}{'tx/veh':>8}{'supp':>7}")
+    for density in (25, 50, 100, 200, 400, 800):
+        for mode, suppress_after in (('gossip', 2), ('flood', 10 ** 9)):
+            r = simulate(density, suppress_after=suppress_after)
+            print(f"{mode:<10}{r['vehicles']:>9}{r['reached']:>9.0%}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+                  f"{r['max_ms']:>9.1f}{r['transmissions']:>7}{r['per_vehicle']:>8.2f}{r['suppressed']:>7}")
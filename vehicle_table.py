@@ -0,0 +1,182 @@
+import math
+import sys
+import threading
+import time
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+# One packed record per neighbour (42 bytes). The vehicle ID string lives once
+# in the intern table and rows only carry its integer handle.
+VEHICLE_DTYPE = np.dtype([
+    ('id', np.int32),
+    ('lat', np.float64),
+    ('lon', np.float64),
+    ('last_seen', np.float64),
+    ('distance', np.float32),
+    ('bearing', np.float32),
+    ('staleness', np.float32),
+    ('quadrant', np.uint8),
+    ('alerted', np.bool_),
+])
+
+# Relative bearing quadrants, centred on the ego heading
+DIRECTIONS = np.array(['ahead', 'right', 'behind', 'left'])
+
+
+class VehicleTable:
+    def __init__(self, capacity=64):
+        self._data = np.zeros(capacity, dtype=VEHICLE_DTYPE)
+        self._size = 0
+        self._names = []      # interned handle -> vehicle ID string
+        self._handles = {}    # vehicle ID string -> interned handle
+        self._rows = {}       # interned handle -> row in self._data
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, vehicle_id):
+        handle = self._handles.get(vehicle_id)
+        return handle is not None and handle in self._rows
+
+    def _intern(self, vehicle_id):
+        handle = self._handles.get(vehicle_id)
+        if handle is None:
+            handle = len(self._names)
+            self._names.append(sys.intern(vehicle_id))
+            self._handles[self._names[handle]] = handle
+        return handle
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if needed <= len(self._data):
+            return
+        capacity = max(needed, 2 * len(self._data))
+        grown = np.zeros(capacity, dtype=VEHICLE_DTYPE)
+        grown[:self._size] = self._data[:self._size]
+        self._data = grown
+
+    def upsert(self, vehicle_id, lat, lon, now=None):
+        self.upsert_many([vehicle_id], [lat], [lon], now)
+
+    def upsert_many(self, vehicle_ids, lats, lons, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._reserve(len(vehicle_ids))
+            rows = np.empty(len(vehicle_ids), dtype=np.intp)
+            for i, vehicle_id in enumerate(vehicle_ids):
+                handle = self._intern(vehicle_id)
+                row = self._rows.get(handle)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._rows[handle] = row
+                    self._data[row] = 0
+                    self._data['id'][row] = handle
+                rows[i] = row
+            self._data['lat'][rows] = lats
+            self._data['lon'][rows] = lons
+            self._data['last_seen'][rows] = now
+
+    def add_relative(self, vehicle_id, distance, bearing, origin_lat, origin_lon, now=None):
+        # Place a simulated vehicle at a distance (m) and bearing (deg) from a point
+        lat1, lon1 = math.radians(origin_lat), math.radians(origin_lon)
+        angular = distance / EARTH_RADIUS_M
+        theta = math.radians(bearing)
+        lat2 = np.arcsin(np.sin(lat1) * np.cos(angular) +
+                         np.cos(lat1) * np.sin(angular) * np.cos(theta))
+        lon2 = lon1 + np.arctan2(np.sin(theta) * np.sin(angular) * np.cos(lat1),
+                                 np.cos(angular) - np.sin(lat1) * np.sin(lat2))
+        self.upsert(vehicle_id, float(np.degrees(lat2)), float(np.degrees(lon2)), now)
+
+    def remove(self, vehicle_id):
+        with self._lock:
+            handle = self._handles.get(vehicle_id)
+            row = self._rows.pop(handle, None) if handle is not None else None
+            if row is None:
+                return False
+            # Swap the last row into the hole to keep the table dense
+            last = self._size - 1
+            if row != last:
+                self._data[row] = self._data[last]
+                self._rows[int(self._data['id'][row])] = row
+            self._size = last
+            return True
+
+    def expire(self, max_age, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            live = self._data[:self._size]
+            keep = (now - live['last_seen']) <= max_age
+            dropped = int(self._size - np.count_nonzero(keep))
+            if dropped:
+                kept = live[keep]
+                self._size = len(kept)
+                self._data[:self._size] = kept
+                self._rows = {int(h): i for i, h in enumerate(kept['id'])}
+        return dropped
+
+    def update(self, ego_lat, ego_lon, ego_heading=0.0, now=None):
+        # Recompute distance, bearing and staleness for every vehicle in one pass
+        now = time.time() if now is None else now
+        with self._lock:
+            live = self._data[:self._size]
+            lat1, lon1 = math.radians(ego_lat), math.radians(ego_lon)
+            lat2 = np.radians(live['lat'])
+            dlat = lat2 - lat1
+            dlon = np.radians(live['lon']) - lon1
+
+            a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+            live['distance'] = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+            y = np.sin(dlon) * np.cos(lat2)
+            x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+            live['bearing'] = np.degrees(np.arctan2(y, x)) % 360
+            live['staleness'] = now - live['last_seen']
+
+            relative = (live['bearing'] - ego_heading + 45) % 360
+            live['quadrant'] = (relative // 90) % 4
+
+    def mark_alerted(self, alerted=True):
+        with self._lock:
+            self._data['alerted'][:self._size] = alerted
+
+    def ids(self):
+        with self._lock:
+            return [self._names[h] for h in self._data['id'][:self._size]]
+
+    def snapshot(self):
+        # (ids, records) copy of the live rows, e.g. for checkpointing
+        with self._lock:
+            live = self._data[:self._size].copy()
+        return [self._names[h] for h in live['id']], live
+
+    def restore(self, vehicle_ids, records):
+        # Replace the contents with an earlier snapshot(); handles are re-interned
+        with self._lock:
+            self._size = 0
+            self._rows = {}
+            self._reserve(len(records))
+            self._data[:len(records)] = records
+            for row, vehicle_id in enumerate(vehicle_ids):
+                handle = self._intern(vehicle_id)
+                self._data['id'][row] = handle
+                self._rows[handle] = row
+            self._size = len(records)
+
+    def rows(self):
+        # Snapshot as (id, distance, direction, staleness, alerted) tuples for display
+        with self._lock:
+            live = self._data[:self._size].copy()
+        names = self._names
+        directions = DIRECTIONS[live['quadrant']]
+        return [
+            (names[h], float(d), str(direction), float(s), bool(alerted))
+            for h, d, direction, s, alerted in zip(
+                live['id'], live['distance'], directions, live['staleness'], live['alerted'])
+        ]
+
+    def nbytes(self):
+        return self._data[:self._size].nbytes
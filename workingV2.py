@@ -1,23 +1,18 @@
 #working version 2 of this code
+import time
+STARTUP_T0 = time.perf_counter()
 import tkinter as tk
 from tkinter import ttk, messagebox
 import cv2
 import numpy as np
 from PIL import Image, ImageTk
 import threading
-import time
 import random
-import math
-import json
+from collections import deque
 from datetime import datetime
-import folium
-import webview
-import requests
-from geopy.distance import geodesic
-import pygame
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.animation import FuncAnimation
+# pygame and matplotlib are imported on first use (init_audio, create_route_tab)
+from cascade_warmup import EYE_MODEL, FACE_MODEL, load_cascade, set_threads, warm_up
+IMPORTS_DONE = time.perf_counter()
 
 class DriverMonitoringSystem:
     def __init__(self, root):
@@ -26,8 +21,12 @@ class DriverMonitoringSystem:
         self.root.geometry("1400x900")
         self.root.configure(bg='#1a1a1a')
         
-        # Initialize pygame for sound alerts
-        pygame.mixer.init()
+        # Startup timing (ms since the module started importing)
+        self.startup_marks = [("imports", (IMPORTS_DONE - STARTUP_T0) * 1000)]
+        self._camera_started_at = None
+        
+        # pygame mixer is started in the background once the window is up
+        self.audio_ready = False
         
         # System state variables
         self.monitoring_active = False
@@ -43,8 +42,10 @@ class DriverMonitoringSystem:
         
         # Camera and CV variables
         self.cap = None
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+        # Cascades are loaded and warmed up in the background while the UI builds
+        self.face_cascade = None
+        self.eye_cascade = None
+        self.detector_ready = threading.Event()
         
         # V2V Communication simulation
         self.nearby_vehicles = [
@@ -53,8 +54,25 @@ class DriverMonitoringSystem:
             {"id": "VEH003", "distance": 25, "direction": "left"},
         ]
         
+        # Widgets of tabs that have not been built yet are None; output meant for
+        # them is kept and applied when the tab is first opened
+        self.emergency_status_label = None
+        self.actions_text = None
+        self.comm_text = None
+        self.route_info_text = None
+        self.ax = None
+        self.vehicles_tree = None
+        self._pending_actions = deque(maxlen=500)
+        self._pending_comms = deque(maxlen=500)
+        self.emergency_status = ("No Emergency Detected", 'green')
+        self.route_info = ""
+        
+        # Started once all the state it touches exists
+        threading.Thread(target=self.warm_up_detector, daemon=True).start()
         self.setup_gui()
+        self.mark_startup("gui built")
         self.start_monitoring_thread()
+        self.root.after_idle(self.on_window_ready)
         
     def setup_gui(self):
         # Create main frame
@@ -76,12 +94,63 @@ class DriverMonitoringSystem:
         style.configure('TNotebook', background='#2a2a2a')
         style.configure('TNotebook.Tab', background='#3a3a3a', foreground='white')
         
-        # Create tabs
+        # Create tabs; only the monitoring tab is built up front, the others on first selection
         self.create_monitoring_tab()
-        self.create_emergency_tab()
-        self.create_route_tab()
-        self.create_v2v_tab()
-        self.create_settings_tab()
+        self.lazy_tabs = {}
+        for text, builder in [('Emergency Response', self.create_emergency_tab),
+                              ('Autonomous Routing', self.create_route_tab),
+                              ('V2V Communication', self.create_v2v_tab),
+                              ('Settings', self.create_settings_tab)]:
+            frame = tk.Frame(self.notebook, bg='#2a2a2a')
+            self.notebook.add(frame, text=text)
+            self.lazy_tabs[str(frame)] = (text, frame, builder)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+    
+    def on_tab_changed(self, event):
+        tab = self.lazy_tabs.pop(self.notebook.select(), None)
+        if tab is not None:
+            text, frame, builder = tab
+            start = time.perf_counter()
+            builder(frame)
+            self.log_action(f"Built '{text}' tab in {(time.perf_counter() - start) * 1000:.0f} ms")
+    
+    def on_window_ready(self):
+        self.mark_startup("window ready")
+        self.report_startup()
+        threading.Thread(target=self.init_audio, daemon=True).start()
+    
+    def mark_startup(self, label):
+        self.startup_marks.append((label, (time.perf_counter() - STARTUP_T0) * 1000))
+    
+    def report_startup(self):
+        report = "Startup: " + ", ".join(f"{label} {ms:.0f} ms" for label, ms in self.startup_marks)
+        self.log_action(report)
+    
+    def warm_up_detector(self):
+        try:
+            start = time.perf_counter()
+            threads = set_threads()
+            face_cascade = load_cascade(FACE_MODEL)
+            eye_cascade = load_cascade(EYE_MODEL)
+            # Same parameters as update_camera_feed (full 640x480 frame)
+            timings = warm_up(face_cascade, eye_cascade, (640, 480),
+                              dict(scaleFactor=1.3, minNeighbors=5))
+            self.face_cascade, self.eye_cascade = face_cascade, eye_cascade
+            self.log_action(f"Detector ready in {(time.perf_counter() - start) * 1000:.0f} ms "
+                            f"({threads} threads, warm-up passes "
+                            f"{', '.join(f'{t:.1f}' for t in timings)} ms)")
+        except Exception as e:
+            self.log_action(f"Detector warm-up failed: {str(e)}")
+        finally:
+            self.detector_ready.set()
+    
+    def init_audio(self):
+        try:
+            import pygame
+            pygame.mixer.init()
+            self.audio_ready = True
+        except Exception as e:
+            self.log_action(f"Audio unavailable: {str(e)}")
         
     def create_monitoring_tab(self):
         # Driver Monitoring Tab
@@ -162,18 +231,17 @@ class DriverMonitoringSystem:
         tk.Button(controls_frame, text="Reset to Normal", 
                  command=self.reset_to_normal, bg='#4CAF50', fg='white').pack(pady=2)
         
-    def create_emergency_tab(self):
+    def create_emergency_tab(self, emergency_frame):
         # Emergency Response Tab
-        emergency_frame = tk.Frame(self.notebook, bg='#2a2a2a')
-        self.notebook.add(emergency_frame, text='Emergency Response')
         
         # Emergency status
         status_frame = tk.LabelFrame(emergency_frame, text="Emergency Status", 
                                     fg='white', bg='#2a2a2a')
         status_frame.pack(fill='x', padx=10, pady=10)
         
-        self.emergency_status_label = tk.Label(status_frame, text="No Emergency Detected", 
-                                              font=('Arial', 14, 'bold'), fg='green', bg='#2a2a2a')
+        self.emergency_status_label = tk.Label(status_frame, text=self.emergency_status[0], 
+                                              font=('Arial', 14, 'bold'), fg=self.emergency_status[1],
+                                              bg='#2a2a2a')
         self.emergency_status_label.pack(pady=10)
         
         # Emergency actions
@@ -184,6 +252,9 @@ class DriverMonitoringSystem:
         self.actions_text = tk.Text(actions_frame, bg='#1a1a1a', fg='white', 
                                    font=('Courier', 10))
         self.actions_text.pack(fill='both', expand=True, padx=5, pady=5)
+        self.actions_text.insert(tk.END, ''.join(self._pending_actions))
+        self.actions_text.see(tk.END)
+        self._pending_actions.clear()
         
         # Emergency contacts
         contacts_frame = tk.LabelFrame(emergency_frame, text="Emergency Contacts", 
@@ -196,10 +267,10 @@ class DriverMonitoringSystem:
             tk.Label(contact_frame, text=contact, fg='white', bg='#2a2a2a').pack(side='left')
             tk.Label(contact_frame, text="● Ready", fg='green', bg='#2a2a2a').pack(side='right')
         
-    def create_route_tab(self):
+    def create_route_tab(self, route_frame):
         # Autonomous Route Tab
-        route_frame = tk.Frame(self.notebook, bg='#2a2a2a')
-        self.notebook.add(route_frame, text='Autonomous Routing')
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         
         # Route information
         info_frame = tk.LabelFrame(route_frame, text="Route Information", 
@@ -208,6 +279,7 @@ class DriverMonitoringSystem:
         
         self.route_info_text = tk.Text(info_frame, height=8, bg='#1a1a1a', fg='white')
         self.route_info_text.pack(fill='x', padx=5, pady=5)
+        self.route_info_text.insert(1.0, self.route_info)
         
         # Map placeholder (would integrate with folium/webview)
         map_frame = tk.LabelFrame(route_frame, text="Live Route Map", 
@@ -215,7 +287,8 @@ class DriverMonitoringSystem:
         map_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Create matplotlib figure for route visualization
-        self.fig, self.ax = plt.subplots(figsize=(8, 6), facecolor='#2a2a2a')
+        self.fig = Figure(figsize=(8, 6), facecolor='#2a2a2a')
+        self.ax = self.fig.add_subplot()
         self.ax.set_facecolor('#1a1a1a')
         self.canvas = FigureCanvasTkAgg(self.fig, map_frame)
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
@@ -235,10 +308,8 @@ class DriverMonitoringSystem:
         tk.Button(controls_frame, text="Continue to Destination", 
                  command=self.continue_route, bg='#4CAF50', fg='white').pack(side='left', padx=5)
         
-    def create_v2v_tab(self):
+    def create_v2v_tab(self, v2v_frame):
         # V2V Communication Tab
-        v2v_frame = tk.Frame(self.notebook, bg='#2a2a2a')
-        self.notebook.add(v2v_frame, text='V2V Communication')
         
         # Nearby vehicles
         vehicles_frame = tk.LabelFrame(v2v_frame, text="Nearby Vehicles", 
@@ -264,6 +335,9 @@ class DriverMonitoringSystem:
         self.comm_text = tk.Text(comm_frame, bg='#1a1a1a', fg='white', font=('Courier', 9))
         comm_scrollbar = tk.Scrollbar(comm_frame, command=self.comm_text.yview)
         self.comm_text.configure(yscrollcommand=comm_scrollbar.set)
+        self.comm_text.insert(tk.END, ''.join(self._pending_comms))
+        self.comm_text.see(tk.END)
+        self._pending_comms.clear()
         
         self.comm_text.pack(side='left', fill='both', expand=True, padx=5, pady=5)
         comm_scrollbar.pack(side='right', fill='y')
@@ -278,10 +352,8 @@ class DriverMonitoringSystem:
         tk.Button(v2v_controls, text="Request Safe Passage", 
                  command=self.request_safe_passage, bg='#FF9800', fg='white').pack(side='left', padx=5)
         
-    def create_settings_tab(self):
+    def create_settings_tab(self, settings_frame):
         # Settings Tab
-        settings_frame = tk.Frame(self.notebook, bg='#2a2a2a')
-        self.notebook.add(settings_frame, text='Settings')
         
         # API Configuration
         api_frame = tk.LabelFrame(settings_frame, text="API Configuration", 
@@ -325,6 +397,7 @@ class DriverMonitoringSystem:
                 messagebox.showerror("Error", "Could not open camera")
                 return
             self.monitoring_active = True
+            self._camera_started_at = time.perf_counter()
             self.update_camera_feed()
         except Exception as e:
             messagebox.showerror("Error", f"Camera error: {str(e)}")
@@ -338,6 +411,12 @@ class DriverMonitoringSystem:
     
     def update_camera_feed(self):
         if self.monitoring_active and self.cap:
+            if self.face_cascade is None:
+                # Still warming up in the background (or the models failed to load)
+                text = "Detector unavailable" if self.detector_ready.is_set() else "Loading detection models..."
+                self.camera_label.configure(text=text, fg='white')
+                self.root.after(30, self.update_camera_feed)
+                return
             ret, frame = self.cap.read()
             if ret:
                 # Flip frame horizontally for mirror effect
@@ -377,6 +456,12 @@ class DriverMonitoringSystem:
                 
                 self.camera_label.configure(image=photo)
                 self.camera_label.image = photo
+                
+                if self._camera_started_at is not None:
+                    self.mark_startup("first camera frame")
+                    self.log_action(f"First camera frame {(time.perf_counter() - self._camera_started_at) * 1000:.0f} ms "
+                                    f"after Start Camera")
+                    self._camera_started_at = None
             
             self.root.after(30, self.update_camera_feed)
     
@@ -436,14 +521,13 @@ class DriverMonitoringSystem:
         self.autonomous_mode = False
         self.heart_rate = 72
         self.fatigue_level = 10
-        self.emergency_status_label.configure(text="No Emergency Detected", fg='green')
+        self.set_emergency_status("No Emergency Detected", 'green')
         self.log_action("System reset to normal operation")
     
     def trigger_emergency(self):
         self.emergency_detected = True
         self.autonomous_mode = True
-        self.emergency_status_label.configure(text="EMERGENCY DETECTED - AUTONOMOUS MODE ACTIVE", 
-                                            fg='red')
+        self.set_emergency_status("EMERGENCY DETECTED - AUTONOMOUS MODE ACTIVE", 'red')
         
         self.log_action("🚨 EMERGENCY DETECTED!")
         self.log_action("→ Engaging autonomous driving mode")
@@ -458,17 +542,37 @@ class DriverMonitoringSystem:
         # Find nearest hospital
         self.find_nearest_hospital()
     
+    def set_emergency_status(self, text, color):
+        self.emergency_status = (text, color)
+        if self.emergency_status_label is not None:
+            self.emergency_status_label.configure(text=text, fg=color)
+    
     def log_action(self, message):
+        if threading.current_thread() is not threading.main_thread():
+            # Widgets are only touched from the Tk thread
+            self.root.after(0, self.log_action, message)
+            return
         timestamp = datetime.now().strftime("%H:%M:%S")
+        if self.actions_text is None:
+            self._pending_actions.append(f"[{timestamp}] {message}\n")
+            return
         self.actions_text.insert(tk.END, f"[{timestamp}] {message}\n")
         self.actions_text.see(tk.END)
     
     def log_communication(self, message):
+        if threading.current_thread() is not threading.main_thread():
+            self.root.after(0, self.log_communication, message)
+            return
         timestamp = datetime.now().strftime("%H:%M:%S")
+        if self.comm_text is None:
+            self._pending_comms.append(f"[{timestamp}] {message}\n")
+            return
         self.comm_text.insert(tk.END, f"[{timestamp}] {message}\n")
         self.comm_text.see(tk.END)
     
     def update_vehicles_list(self):
+        if self.vehicles_tree is None:
+            return
         # Clear existing items
         for item in self.vehicles_tree.get_children():
             self.vehicles_tree.delete(item)
@@ -492,6 +596,8 @@ class DriverMonitoringSystem:
         self.log_communication("→ Requesting clear emergency lane")
     
     def update_route_map(self):
+        if self.ax is None:
+            return
         self.ax.clear()
         self.ax.set_facecolor('#1a1a1a')
         
@@ -552,8 +658,10 @@ Vehicle Status:
 - Hazard lights: ON
 - Emergency beacon: ACTIVE
         """
-        self.route_info_text.delete(1.0, tk.END)
-        self.route_info_text.insert(1.0, route_info.strip())
+        self.route_info = route_info.strip()
+        if self.route_info_text is not None:
+            self.route_info_text.delete(1.0, tk.END)
+            self.route_info_text.insert(1.0, self.route_info)
     
     def find_safe_stop(self):
         self.log_action("🛑 Finding safe stop location...")